@@ -1,9 +1,15 @@
+import logging
+import re
+import time
+from datetime import datetime
 from logging.config import fileConfig
 
-from sqlalchemy import engine_from_config
+from sqlalchemy import Boolean, DateTime, Integer, MetaData, String, func, select
+from sqlalchemy import create_engine, engine_from_config, event
 from sqlalchemy import pool
 
 from alembic import context
+from alembic.util import CommandError
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -26,6 +32,37 @@ target_metadata = Base.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+logger = logging.getLogger("alembic.env.check")
+
+# Режим проверки миграций:
+#   alembic -x check=true -x check_url=sqlite:///check.db upgrade head
+# Все ревизии прогоняются на отдельной БД (по умолчанию SQLite в памяти),
+# после каждой ревизии пустые таблицы заполняются тестовыми строками,
+# а операторы, берущие блокирующие или переписывающие таблицу локи,
+# проверяются по бюджету длительности.
+x_args = context.get_x_argument(as_dictionary=True)
+CHECK_MODE = x_args.get("check", "false").lower() in ("1", "true", "yes")
+CHECK_URL = x_args.get("check_url", "sqlite://")
+CHECK_SEED_ROWS = int(x_args.get("check_seed_rows", 10000))
+CHECK_MAX_LOCK_SECONDS = float(x_args.get("check_max_lock_seconds", 1.0))
+CHECK_MAX_REVISION_SECONDS = float(x_args.get("check_max_revision_seconds", 30.0))
+
+# (шаблон, описание) для операторов, которые в PostgreSQL берут
+# ACCESS EXCLUSIVE/SHARE lock на время сканирования или перезаписи таблицы
+LOCKING_STATEMENTS = [
+    (r"ALTER\s+TABLE.+ALTER\s+COLUMN.+\bTYPE\b", "column type change rewrites table"),
+    (r"ALTER\s+TABLE.+ADD\s+COLUMN.+DEFAULT\s+\w+\(", "volatile default rewrites table"),
+    (r"ALTER\s+TABLE.+SET\s+NOT\s+NULL", "NOT NULL scans table under ACCESS EXCLUSIVE"),
+    (r"ALTER\s+TABLE.+ADD\s+(CONSTRAINT\s+\w+\s+)?(FOREIGN\s+KEY|CHECK)(?!.*NOT\s+VALID)",
+     "constraint validation scans table"),
+    (r"CREATE\s+(UNIQUE\s+)?INDEX\s+(?!CONCURRENTLY)", "index build blocks writes"),
+    (r"ALTER\s+TABLE.+(DROP\s+COLUMN|ADD\s+COLUMN|RENAME)", "ACCESS EXCLUSIVE lock"),
+    (r"VACUUM\s+FULL|CLUSTER\b", "table rewrite"),
+    (r"^\s*LOCK\s+TABLE", "explicit lock held until commit"),
+    (r"^\s*DROP\s+TABLE", "ACCESS EXCLUSIVE lock"),
+    (r"^\s*UPDATE\b|^\s*DELETE\b", "row locks on touched rows"),
+]
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -51,6 +88,111 @@ def run_migrations_offline() -> None:
         context.run_migrations()
 
 
+def _lock_reason(statement: str):
+    """Описание блокировки, которую берет оператор, или None"""
+    for pattern, reason in LOCKING_STATEMENTS:
+        if re.search(pattern, statement, re.IGNORECASE | re.DOTALL):
+            return reason
+    return None
+
+
+def _seed_value(column, i: int, rows: int):
+    """Тестовое значение для колонки в i-й строке"""
+    if column.foreign_keys:
+        return i % rows + 1
+    if isinstance(column.type, Integer):
+        return i + 1
+    if isinstance(column.type, String):
+        return f"{column.name}_{i}"
+    if isinstance(column.type, Boolean):
+        return i % 2 == 0
+    if isinstance(column.type, DateTime):
+        return datetime.now()
+    return None
+
+
+def _seed_empty_tables(connection, rows: int) -> None:
+    """Заполняет пустые таблицы, чтобы следующие ревизии шли по данным"""
+    # Заполняем только таблицы моделей: служебные (alembic_version,
+    # теневые таблицы FTS и т.п.) пропускаем
+    metadata = MetaData()
+    metadata.reflect(
+        bind=connection,
+        only=lambda name, _: name in target_metadata.tables,
+    )
+    for table in metadata.sorted_tables:
+        if connection.execute(select(func.count()).select_from(table)).scalar():
+            continue
+        for start in range(0, rows, 1000):
+            connection.execute(table.insert(), [
+                {c.name: _seed_value(c, i, rows) for c in table.columns}
+                for i in range(start, min(start + 1000, rows))
+            ])
+        logger.info("Seeded %s with %d rows", table.name, rows)
+
+
+def run_migrations_check() -> None:
+    """Прогоняет миграции на копии БД и проверяет бюджеты блокировок"""
+    connectable = create_engine(CHECK_URL, poolclass=pool.StaticPool)
+    statements = []
+    violations = []
+
+    @event.listens_for(connectable, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context_, executemany):
+        conn.info["check_started"] = time.perf_counter()
+
+    @event.listens_for(connectable, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context_, executemany):
+        statements.append({
+            "sql": " ".join(statement.split()),
+            "duration": time.perf_counter() - conn.info.pop("check_started"),
+            "rows": cursor.rowcount,
+            "lock": _lock_reason(statement),
+        })
+
+    def on_version_apply(ctx, step, heads, run_args):
+        revision = step.up_revision_id
+        applied = [s for s in statements if "alembic_version" not in s["sql"]]
+        statements.clear()
+        total = sum(s["duration"] for s in applied)
+        logger.info("Revision %s: %d statements, %.3fs", revision, len(applied), total)
+        for index, s in enumerate(applied):
+            if s["lock"]:
+                held = s["duration"]
+                if re.match(r"LOCK\s+TABLE", s["sql"], re.IGNORECASE):
+                    # Явная блокировка держится до конца транзакции ревизии
+                    held = sum(later["duration"] for later in applied[index:])
+                logger.info("  %.3fs rows=%s [%s] %s", held, s["rows"], s["lock"], s["sql"][:120])
+                if held > CHECK_MAX_LOCK_SECONDS:
+                    violations.append(
+                        f"{revision}: {s['lock']} held {held:.3f}s "
+                        f"(budget {CHECK_MAX_LOCK_SECONDS}s): {s['sql'][:120]}"
+                    )
+        if total > CHECK_MAX_REVISION_SECONDS:
+            violations.append(
+                f"{revision}: took {total:.3f}s (budget {CHECK_MAX_REVISION_SECONDS}s)"
+            )
+        if step.is_upgrade:
+            _seed_empty_tables(ctx.connection, CHECK_SEED_ROWS)
+            statements.clear()
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            transaction_per_migration=True,
+            on_version_apply=on_version_apply,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+    connectable.dispose()
+    if violations:
+        raise CommandError("Migration budget exceeded:\n" + "\n".join(violations))
+    logger.info("Migration check passed")
+
+
 def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
@@ -75,5 +217,7 @@ def run_migrations_online() -> None:
 
 if context.is_offline_mode():
     run_migrations_offline()
+elif CHECK_MODE:
+    run_migrations_check()
 else:
     run_migrations_online()
@@ -0,0 +1,65 @@
+"""Add users name search index
+
+Revision ID: b7e4d2a1c9f3
+Revises: 14ec022eaecf
+Create Date: 2026-10-19 10:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d2a1c9f3'
+down_revision: Union[str, Sequence[str], None] = '14ec022eaecf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # CONCURRENTLY не блокирует запись, но не работает внутри транзакции
+        with op.get_context().autocommit_block():
+            op.create_index(
+                'ix_users_name_trgm', 'users', ['name'],
+                postgresql_using='gin',
+                postgresql_ops={'name': 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE users_name_fts USING fts5("
+            "name, content='users', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER users_name_fts_ai AFTER INSERT ON users BEGIN "
+            "INSERT INTO users_name_fts(rowid, name) VALUES (new.id, new.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_name_fts_ad AFTER DELETE ON users BEGIN "
+            "INSERT INTO users_name_fts(users_name_fts, rowid, name) VALUES ('delete', old.id, old.name); END"
+        )
+        op.execute(
+            "CREATE TRIGGER users_name_fts_au AFTER UPDATE OF name ON users BEGIN "
+            "INSERT INTO users_name_fts(users_name_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+            "INSERT INTO users_name_fts(rowid, name) VALUES (new.id, new.name); END"
+        )
+        op.execute("INSERT INTO users_name_fts(users_name_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_users_name_trgm', table_name='users', postgresql_concurrently=True)
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS users_name_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS users_name_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS users_name_fts_ai')
+        op.execute('DROP TABLE IF EXISTS users_name_fts')
@@ -0,0 +1,90 @@
+"""Partition posts by user_id
+
+Revision ID: c4a8e1f5d2b6
+Revises: b7e4d2a1c9f3
+Create Date: 2026-10-19 14:05:47.318260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e1f5d2b6'
+down_revision: Union[str, Sequence[str], None] = 'b7e4d2a1c9f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Число хеш-секций posts в PostgreSQL
+POSTS_PARTITIONS = 16
+
+
+def _swap_posts(*create_statements: str) -> None:
+    """Создает posts_new, копирует в нее posts и подменяет таблицу.
+
+    До копирования posts блокируется в режиме SHARE ROW EXCLUSIVE: чтение
+    продолжается, а записи ждут до конца транзакции миграции, иначе строки,
+    вставленные во время копирования, пропали бы вместе со старой таблицей.
+    DROP повышает блокировку до ACCESS EXCLUSIVE только на время подмены.
+
+    Последовательность posts_id_seq переживает DROP старой таблицы,
+    поэтому новые id продолжают старую нумерацию.
+    """
+    op.execute('LOCK TABLE posts IN SHARE ROW EXCLUSIVE MODE')
+    op.execute('ALTER SEQUENCE posts_id_seq OWNED BY NONE')
+    for statement in create_statements:
+        op.execute(statement)
+    op.execute(
+        'INSERT INTO posts_new (id, title, content, user_id) '
+        'SELECT id, title, content, user_id FROM posts'
+    )
+    op.execute('DROP TABLE posts')
+    op.execute('ALTER TABLE posts_new RENAME TO posts')
+    op.execute('ALTER TABLE posts RENAME CONSTRAINT posts_new_pkey TO posts_pkey')
+    op.execute('ALTER TABLE posts RENAME CONSTRAINT posts_new_user_id_fkey TO posts_user_id_fkey')
+    op.execute('ALTER SEQUENCE posts_id_seq OWNED BY posts.id')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        op.create_index('ix_posts_user_id', 'posts', ['user_id', 'id'])
+        return
+
+    # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+    _swap_posts(
+        "CREATE TABLE posts_new ("
+        "id INTEGER NOT NULL DEFAULT nextval('posts_id_seq'), "
+        "title VARCHAR, "
+        "content VARCHAR, "
+        "user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE, "
+        "PRIMARY KEY (id, user_id)"
+        ") PARTITION BY HASH (user_id)",
+        *(
+            f'CREATE TABLE posts_p{remainder} PARTITION OF posts_new '
+            f'FOR VALUES WITH (MODULUS {POSTS_PARTITIONS}, REMAINDER {remainder})'
+            for remainder in range(POSTS_PARTITIONS)
+        ),
+    )
+    # Индекс строится после копирования данных, на родителе он создается в каждой секции
+    op.create_index('ix_posts_user_id', 'posts', ['user_id', 'id'])
+    op.execute('ANALYZE posts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index('ix_posts_user_id', table_name='posts')
+        return
+
+    # Секции удаляются вместе с родительской таблицей
+    _swap_posts(
+        "CREATE TABLE posts_new ("
+        "id INTEGER NOT NULL DEFAULT nextval('posts_id_seq') PRIMARY KEY, "
+        "title VARCHAR, "
+        "content VARCHAR, "
+        "user_id INTEGER NOT NULL REFERENCES users (id) ON DELETE CASCADE"
+        ")"
+    )
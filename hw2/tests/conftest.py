@@ -0,0 +1,20 @@
+import pytest
+
+from hw2.sql_alchemy import DatabaseManager
+
+
+@pytest.fixture
+def make_manager(tmp_path):
+    """Создает DatabaseManager на SQLite-файле с таблицами и закрывает его"""
+    managers = []
+
+    def make(name='primary.db', **kwargs):
+        manager = DatabaseManager(f"sqlite:///{tmp_path / name}", **kwargs)
+        assert manager.create_tables()
+        managers.append(manager)
+        return manager
+
+    yield make
+
+    for manager in managers:
+        manager.close()
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from hw2.sql_alchemy import DatabaseManager, UserLoader
+
+
+class TestGetUsers:
+    """Пакетное чтение DatabaseManager.get_users / users_exist"""
+
+    def test_found_and_missing(self, make_manager):
+        # Arrange
+        manager = make_manager()
+        user_id = manager.create_user("Alice", "alice@example.com", 30)
+
+        # Act
+        users = manager.get_users([user_id, 999])
+        exists = manager.users_exist([user_id, 999])
+
+        # Assert
+        assert users[user_id]['name'] == "Alice"
+        assert users[999] is None
+        assert exists == {user_id: True, 999: False}
+
+    def test_error_is_raised(self, tmp_path):
+        """Ошибка БД пробрасывается и доходит до UserLoader, а не выглядит как промах"""
+        # Arrange
+        manager = DatabaseManager(f"sqlite:///{tmp_path / 'empty.db'}")  # таблиц нет
+        loader = UserLoader(manager.get_users)
+
+        # Act / Assert
+        try:
+            with pytest.raises(OperationalError):
+                manager.get_users([1, 2])
+            with pytest.raises(OperationalError):
+                manager.users_exist([1])
+            with pytest.raises(OperationalError):
+                loader.get(1)
+        finally:
+            manager.close()
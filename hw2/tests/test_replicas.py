@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine
+
+from hw2.sql_alchemy import ReplicaRouter
+
+
+@pytest.fixture
+def engines():
+    created = [create_engine("sqlite://") for _ in range(2)]
+    yield created
+    for engine in created:
+        engine.dispose()
+
+
+def in_other_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class TestReplicaRouter:
+    """Выбор реплики: стратегии, отставание и read-your-writes"""
+
+    def test_round_robin(self, engines):
+        # Arrange
+        router = ReplicaRouter(engines)
+
+        # Act
+        chosen = [router.choose() for _ in range(4)]
+
+        # Assert
+        assert chosen == engines * 2
+
+    def test_least_latency(self, engines):
+        # Arrange
+        router = ReplicaRouter(engines, strategy="least_latency")
+        router.record_latency(engines[0], 0.5)
+        router.record_latency(engines[1], 0.1)
+
+        # Act / Assert
+        assert router.choose() is engines[1]
+
+    def test_lagging_replicas_are_skipped(self, engines, monkeypatch):
+        # Arrange
+        router = ReplicaRouter(engines, max_lag=1.0)
+        lags = {engines[0]: 10.0, engines[1]: 0.5}
+        monkeypatch.setattr(router, "replica_lag", lags.__getitem__)
+
+        # Act / Assert
+        assert {router.choose() for _ in range(3)} == {engines[1]}
+        lags[engines[1]] = float("inf")
+        assert router.choose() is None
+
+    def test_write_keeps_thread_on_primary(self, engines):
+        # Arrange
+        router = ReplicaRouter(engines, sticky_seconds=60)
+
+        # Act
+        router.mark_write()
+
+        # Assert
+        assert router.choose() is None
+        assert in_other_thread(router.choose) in engines
+
+    def test_primary_block(self, engines):
+        # Arrange
+        router = ReplicaRouter(engines)
+
+        # Act / Assert
+        with router.primary():
+            with router.primary():
+                assert router.choose() is None
+            assert router.choose() is None
+        assert router.choose() in engines
+
+    def test_unknown_strategy(self, engines):
+        with pytest.raises(ValueError):
+            ReplicaRouter(engines, strategy="random")
+
+
+class TestDatabaseManagerRouting:
+    """DatabaseManager с primary и репликой в разных файлах SQLite
+
+    Реплика не получает записи primary, поэтому по результату чтения
+    видно, куда оно ушло.
+    """
+
+    @pytest.fixture
+    def replica(self, make_manager):
+        replica = make_manager("replica.db")
+        replica.create_user("Replica", "replica@example.com", 50)
+        return replica
+
+    @pytest.fixture
+    def routed(self, make_manager, replica, tmp_path):
+        return make_manager("primary.db", replica_urls=[f"sqlite:///{tmp_path / 'replica.db'}"])
+
+    def test_reads_go_to_replica(self, routed, replica):
+        # Act / Assert
+        assert routed.get_user(1)["name"] == "Replica"
+
+    def test_write_before_first_read_is_read_back(self, routed, replica):
+        # Act
+        user_id = routed.create_user("Alice", "alice@example.com", 30)
+
+        # Assert
+        assert routed.get_user(user_id)["name"] == "Alice"
+        assert in_other_thread(lambda: routed.get_user(user_id)["name"]) == "Replica"
+
+    def test_reads_return_to_replica_after_sticky_window(self, routed, replica):
+        # Arrange
+        routed.create_user("Alice", "alice@example.com", 30)
+        routed.get_replicas().sticky_seconds = 0
+
+        # Act / Assert
+        assert routed.get_user(1)["name"] == "Replica"
+
+    def test_primary_block_reads_primary(self, routed, replica):
+        # Arrange
+        in_other_thread(lambda: routed.create_user("Alice", "alice@example.com", 30))
+
+        # Act / Assert
+        assert routed.get_user(1)["name"] == "Replica"
+        with routed.primary():
+            assert routed.get_user(1)["name"] == "Alice"
@@ -0,0 +1,143 @@
+import fakeredis
+import pytest
+from sqlalchemy import event
+
+from hw2.sql_alchemy import RedisResultCache, ResultCache
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def count_selects():
+    """Подключает к engine менеджера счетчик SELECT"""
+    def attach(manager):
+        selects = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if statement.startswith("SELECT"):
+                selects.append(statement)
+
+        event.listen(manager.get_engine(), "before_cursor_execute", before_cursor_execute)
+        return selects
+
+    return attach
+
+
+@pytest.mark.parametrize("cache_factory", [
+    lambda server: ResultCache(),
+    lambda server: RedisResultCache(fakeredis.FakeRedis(server=server)),
+], ids=["memory", "redis"])
+class TestResultCache:
+    """Кеш результатов get_users_by_age: попадание, промах и инвалидация"""
+
+    def test_second_read_hits_cache(self, make_manager, count_selects, server, cache_factory):
+        # Arrange
+        manager = make_manager(result_cache=cache_factory(server))
+        manager.create_user("Alice", "alice@example.com", 30)
+        selects = count_selects(manager)
+
+        # Act
+        first = manager.get_users_by_age(min_age=18)
+        second = manager.get_users_by_age(min_age=18)
+
+        # Assert
+        assert first == second == [{"id": 1, "name": "Alice", "email": "alice@example.com", "age": 30}]
+        assert len(selects) == 1
+        assert manager.result_cache_stats()["hits"] == 1
+
+    def test_other_params_miss(self, make_manager, count_selects, server, cache_factory):
+        # Arrange
+        manager = make_manager(result_cache=cache_factory(server))
+        manager.create_user("Alice", "alice@example.com", 30)
+        manager.get_users_by_age(min_age=18)
+        selects = count_selects(manager)
+
+        # Act
+        users = manager.get_users_by_age(min_age=40)
+
+        # Assert
+        assert users == []
+        assert len(selects) == 1
+        assert manager.result_cache_stats()["misses"] == 2
+
+    def test_write_invalidates(self, make_manager, server, cache_factory):
+        # Arrange
+        manager = make_manager(result_cache=cache_factory(server))
+        user_id = manager.create_user("Alice", "alice@example.com", 30)
+        manager.get_users_by_age(min_age=18)
+
+        # Act
+        manager.update_user_email(user_id, "new@example.com")
+        users = manager.get_users_by_age(min_age=18)
+
+        # Assert
+        assert users[0]["email"] == "new@example.com"
+        assert manager.result_cache_stats()["invalidations"] == 2
+
+    def test_returned_rows_are_copies(self, make_manager, server, cache_factory):
+        # Arrange
+        manager = make_manager(result_cache=cache_factory(server))
+        manager.create_user("Alice", "alice@example.com", 30)
+
+        # Act
+        manager.get_users_by_age(min_age=18)[0]["name"] = "Mallory"
+        manager.get_users_by_age(min_age=18)[0]["name"] = "Mallory"
+
+        # Assert
+        assert manager.get_users_by_age(min_age=18)[0]["name"] == "Alice"
+
+
+class TestRedisResultCacheFailures:
+    """Недоступный Redis: чтение идет в БД, запись не падает"""
+
+    def test_shared_invalidation_between_managers(self, make_manager, server):
+        """Запись через один менеджер сбрасывает кеш другого с тем же Redis"""
+        # Arrange
+        reader = make_manager(result_cache=RedisResultCache(fakeredis.FakeRedis(server=server)))
+        writer = make_manager(result_cache=RedisResultCache(fakeredis.FakeRedis(server=server)))
+        reader.get_users_by_age(min_age=18)
+
+        # Act
+        writer.create_user("Alice", "alice@example.com", 30)
+
+        # Assert
+        assert [user["name"] for user in reader.get_users_by_age(min_age=18)] == ["Alice"]
+
+    def test_redis_down_reads_from_database(self, make_manager, count_selects, server):
+        # Arrange
+        manager = make_manager(result_cache=RedisResultCache(fakeredis.FakeRedis(server=server)))
+        manager.create_user("Alice", "alice@example.com", 30)
+        manager.get_users_by_age(min_age=18)
+        selects = count_selects(manager)
+        server.connected = False
+
+        # Act
+        users = manager.get_users_by_age(min_age=18)
+        user_id = manager.create_user("Bob", "bob@example.com", 40)
+
+        # Assert
+        assert [user["name"] for user in users] == ["Alice"]
+        assert len(selects) == 1
+        assert user_id is not None
+        stats = manager.result_cache_stats()
+        assert stats["misses"] == 2
+        assert stats["errors"] == 2    # ключ (поколение) и инвалидация
+
+    def test_failed_invalidation_is_retried(self, make_manager, server):
+        """Запись при недоступном Redis не оставляет устаревший результат после восстановления"""
+        # Arrange
+        manager = make_manager(result_cache=RedisResultCache(fakeredis.FakeRedis(server=server)))
+        manager.create_user("Alice", "alice@example.com", 30)
+        manager.get_users_by_age(min_age=18)
+
+        # Act
+        server.connected = False
+        manager.create_user("Bob", "bob@example.com", 40)
+        server.connected = True
+        users = manager.get_users_by_age(min_age=18)
+
+        # Assert
+        assert [user["name"] for user in users] == ["Alice", "Bob"]
@@ -0,0 +1,73 @@
+import logging
+
+from hw2.sql_alchemy import DatabaseManager, StatementCache
+
+
+class TestStatementCache:
+    """LRU-кеш скомпилированных запросов"""
+
+    def test_lru_eviction_and_stats(self):
+        """Вытесняется давно не использованный ключ, статистика считает попадания"""
+        # Arrange
+        cache = StatementCache(maxsize=2)
+        cache['a'] = 1
+        cache['b'] = 2
+
+        # Act
+        assert cache.get('a') == 1       # 'a' становится свежим
+        cache['c'] = 3                   # вытесняет 'b'
+
+        # Assert
+        assert cache.get('b') is None
+        assert cache.get('c') == 3
+        assert len(cache) == 2
+        assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 2, 'hit_rate': 2 / 3}
+
+    def test_repeated_queries_hit_cache(self, make_manager):
+        """Повторные запросы берут скомпилированный SQL из кеша менеджера"""
+        # Arrange
+        manager = make_manager()
+        user_id = manager.create_user("Alice", "alice@example.com", 30)
+        manager.get_user(user_id)
+        before = manager.statement_cache_stats()
+
+        # Act
+        for _ in range(5):
+            manager.get_user(user_id)
+
+        # Assert
+        after = manager.statement_cache_stats()
+        assert after['hits'] - before['hits'] == 5
+        assert after['misses'] == before['misses']
+
+
+class TestPrepareThreshold:
+    """prepare_threshold работает только с psycopg 3"""
+
+    def test_passed_to_psycopg3(self, monkeypatch):
+        # Arrange
+        captured = {}
+        monkeypatch.setattr('hw2.sql_alchemy.create_engine',
+                            lambda url, **kwargs: captured.update(kwargs))
+        manager = DatabaseManager("postgresql+psycopg://u:p@localhost/test", prepare_threshold=3)
+
+        # Act
+        manager.get_engine()
+
+        # Assert
+        assert captured['connect_args'] == {'prepare_threshold': 3}
+
+    def test_other_driver_warns(self, monkeypatch, caplog):
+        # Arrange
+        captured = {}
+        monkeypatch.setattr('hw2.sql_alchemy.create_engine',
+                            lambda url, **kwargs: captured.update(kwargs))
+        manager = DatabaseManager("postgresql+psycopg2://u:p@localhost/test", prepare_threshold=3)
+
+        # Act
+        with caplog.at_level(logging.WARNING, logger='hw2.sql_alchemy'):
+            manager.get_engine()
+
+        # Assert
+        assert captured['connect_args'] == {}
+        assert 'postgresql+psycopg://' in caplog.text
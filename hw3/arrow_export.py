@@ -0,0 +1,146 @@
+"""Колоночная выгрузка users/posts и Mongo-коллекции users в Arrow/Parquet.
+
+Строки читаются пачками (yield_per / batch_size курсора Mongo) и сразу
+раскладываются по колонкам Arrow, без промежуточных словарей на строку
+для SQL-таблиц. Parquet пишется датасетом с hive-секционированием
+(например age=30/part-0.parquet), аналитика читает его без обращения к OLTP.
+
+Запуск из корня репозитория:
+    python -m hw3.arrow_export sql users exports/users --partition-by age
+    python -m hw3.arrow_export sql posts exports/posts
+    python -m hw3.arrow_export mongo users exports/mongo_users --partition-by city
+"""
+import argparse
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from hw3.alembic_sqlalchemy import STREAM_BATCH_SIZE, Post, User, engine
+
+USERS_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('name', pa.string()),
+    ('email', pa.string()),
+    ('age', pa.int32()),
+])
+POSTS_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('title', pa.string()),
+    ('content', pa.string()),
+    ('user_id', pa.int64()),
+])
+# Документы hw4: {name, age, city, status, profile: {skill, level}}
+MONGO_USERS_SCHEMA = pa.schema([
+    ('_id', pa.string()),
+    ('name', pa.string()),
+    ('age', pa.int32()),
+    ('city', pa.string()),
+    ('status', pa.string()),
+    ('profile', pa.struct([('skill', pa.string()), ('level', pa.int32())])),
+])
+
+SQL_TABLES = {'users': (User.__table__, USERS_SCHEMA), 'posts': (Post.__table__, POSTS_SCHEMA)}
+
+
+def iter_sql_batches(table_name: str, bind: Engine = engine,
+                     batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pa.RecordBatch]:
+    """Record batch'и SQL-таблицы в порядке первичного ключа"""
+    table, schema = SQL_TABLES[table_name]
+    query = select(*(table.c[name] for name in schema.names)).order_by(*table.primary_key.columns)
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=batch_size).execute(query)
+        for rows in result.partitions():
+            columns = zip(*rows)
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            )
+
+
+def iter_mongo_batches(collection, query: Optional[dict] = None,
+                       schema: pa.Schema = MONGO_USERS_SCHEMA,
+                       batch_size: int = STREAM_BATCH_SIZE) -> Iterator[pa.RecordBatch]:
+    """Record batch'и Mongo-коллекции; в выборку попадают только поля схемы"""
+    projection = {name: 1 for name in schema.names}
+    cursor = collection.find(query or {}, projection).batch_size(batch_size)
+    while docs := list(islice(cursor, batch_size)):
+        for doc in docs:
+            doc['_id'] = str(doc['_id'])
+        yield pa.RecordBatch.from_pylist(docs, schema=schema)
+
+
+def write_parquet(batches: Iterable[pa.RecordBatch], schema: pa.Schema, path: str,
+                  partition_by: Optional[List[str]] = None,
+                  max_rows_per_file: int = 1_000_000) -> int:
+    """Пишет пачки в Parquet-датасет по мере поступления и возвращает число строк"""
+    rows = 0
+
+    def counted():
+        nonlocal rows
+        for batch in batches:
+            rows += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        counted(), path, schema=schema, format='parquet',
+        partitioning=partition_by, partitioning_flavor='hive' if partition_by else None,
+        existing_data_behavior='delete_matching',
+        max_rows_per_file=max_rows_per_file,
+        max_rows_per_group=min(max_rows_per_file, 128 * 1024),
+    )
+    return rows
+
+
+def read_parquet(path: str, partition_by: Optional[List[str]] = None) -> pa.Table:
+    """Читает датасет целиком в Arrow-таблицу"""
+    partitioning = 'hive' if partition_by else None
+    return ds.dataset(path, format='parquet', partitioning=partitioning).to_table()
+
+
+def to_pandas(table: pa.Table):
+    """DataFrame на Arrow-типах: колонки ссылаются на буферы Arrow без копирования"""
+    import pandas as pd
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def to_polars(table: pa.Table):
+    """polars.DataFrame поверх тех же буферов Arrow"""
+    import polars as pl
+    return pl.from_arrow(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export users/posts to partitioned Parquet')
+    parser.add_argument('source', choices=['sql', 'mongo'])
+    parser.add_argument('table', help='users/posts for sql, collection name for mongo')
+    parser.add_argument('path', help='output dataset directory')
+    parser.add_argument('--partition-by', action='append', help='hive partition column, repeatable')
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--mongo-db', default='simple_db')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.source == 'sql':
+        if args.table not in SQL_TABLES:
+            parser.error(f'table must be one of {sorted(SQL_TABLES)}')
+        schema = SQL_TABLES[args.table][1]
+        batches = iter_sql_batches(args.table, batch_size=args.batch_size)
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+        schema = MONGO_USERS_SCHEMA
+        batches = iter_mongo_batches(client[args.mongo_db][args.table], batch_size=args.batch_size)
+
+    rows = write_parquet(batches, schema, args.path, args.partition_by)
+    elapsed = time.perf_counter() - started
+    print(f'Exported {rows} rows to {args.path} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/sec)')
+
+
+if __name__ == '__main__':
+    main()
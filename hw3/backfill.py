@@ -0,0 +1,164 @@
+"""Пакетный backfill для миграций данных.
+
+Вместо одного ``UPDATE users SET ...`` на всю таблицу проходим по первичному
+ключу keyset-пакетами, коммитим каждый пакет отдельно и делаем паузы между
+ними, чтобы не раздувать WAL и не держать блокировки строк минутами.
+
+Пример использования в ревизии Alembic::
+
+    from hw3.backfill import Backfill
+
+    def upgrade() -> None:
+        op.add_column('users', sa.Column('age', sa.Integer(), nullable=True))
+        with op.get_context().autocommit_block():
+            users = sa.table('users', sa.column('id'), sa.column('age'))
+            Backfill(
+                op.get_bind(), users,
+                values={'age': 0},
+                where=users.c.age.is_(None),
+                checkpoint_file='backfill_users_age.json',
+            ).run()
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import Table, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+
+def postgres_replica_lag(conn: Connection) -> float:
+    """Максимальное отставание реплик в секундах (0, если реплик нет)"""
+    if conn.dialect.name != 'postgresql':
+        return 0.0
+    lag = conn.execute(text(
+        "SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) "
+        "FROM pg_stat_replication"
+    )).scalar()
+    return float(lag or 0)
+
+
+class Backfill:
+    """Заполняет колонки пакетами по первичному ключу"""
+
+    def __init__(self, bind: Engine | Connection, table: Table, values: Dict[str, Any],
+                 where=None, batch_size: int = 1000,
+                 target_batch_seconds: float = 0.5, max_sleep: float = 5.0,
+                 max_replica_lag: float = 10.0,
+                 lag_fn: Optional[Callable[[Connection], float]] = postgres_replica_lag,
+                 checkpoint_file: Optional[str] = None):
+        self.bind = bind
+        self.table = table
+        self.values = values
+        self.where = where
+        self.batch_size = batch_size
+        self.target_batch_seconds = target_batch_seconds
+        self.max_sleep = max_sleep
+        self.max_replica_lag = max_replica_lag
+        self.lag_fn = lag_fn
+        self.checkpoint_file = checkpoint_file
+
+        pk = list(table.primary_key.columns) or [table.c.id]
+        if len(pk) != 1:
+            raise ValueError('Backfill supports single-column primary keys only')
+        self.pk = pk[0]
+
+    @contextmanager
+    def _transaction(self):
+        """Отдельная транзакция на каждый пакет; при ошибке пакет откатывается"""
+        if isinstance(self.bind, Engine):
+            with self.bind.begin() as conn:
+                yield conn
+            return
+        try:
+            yield self.bind
+        except BaseException:
+            if self.bind.in_transaction():
+                self.bind.rollback()
+            raise
+        if self.bind.in_transaction():
+            self.bind.commit()
+
+    def _load_checkpoint(self) -> Tuple[Optional[Any], int]:
+        """(последний обработанный ключ, строк обновлено до прерывания)"""
+        if not self.checkpoint_file or not os.path.exists(self.checkpoint_file):
+            return None, 0
+        with open(self.checkpoint_file) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('table') != self.table.name:
+            raise ValueError(f"Checkpoint {self.checkpoint_file} belongs to table "
+                             f"{checkpoint.get('table')!r}, not {self.table.name!r}")
+        return checkpoint.get('last_pk'), checkpoint.get('rows', 0)
+
+    def _save_checkpoint(self, last_pk: Any, rows: int):
+        if not self.checkpoint_file:
+            return
+        tmp_file = f'{self.checkpoint_file}.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'table': self.table.name, 'last_pk': last_pk, 'rows': rows}, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def _next_batch_end(self, conn: Connection, last_pk: Optional[Any]) -> Optional[Any]:
+        """Верхняя граница следующего пакета по keyset"""
+        query = select(self.pk).order_by(self.pk).limit(self.batch_size)
+        if last_pk is not None:
+            query = query.where(self.pk > last_pk)
+        if self.where is not None:
+            query = query.where(self.where)
+        ids = conn.execute(query).scalars().all()
+        return ids[-1] if ids else None
+
+    def _pause(self, elapsed: float):
+        """Адаптивная пауза по длительности пакета и отставанию реплик"""
+        sleep = min(self.max_sleep, elapsed * max(elapsed / self.target_batch_seconds, 0.1))
+        if self.lag_fn is not None:
+            with self._transaction() as conn:
+                lag = self.lag_fn(conn)
+            while lag > self.max_replica_lag:
+                logger.warning('Replica lag %.1fs exceeds %.1fs, waiting', lag, self.max_replica_lag)
+                time.sleep(self.max_sleep)
+                with self._transaction() as conn:
+                    lag = self.lag_fn(conn)
+        if sleep > 0:
+            time.sleep(sleep)
+
+    def run(self) -> int:
+        """Выполняет backfill и возвращает число обновленных строк (с учетом прерванных запусков)"""
+        last_pk, total = self._load_checkpoint()
+        if last_pk is not None:
+            logger.info('Resuming backfill of %s after %s=%s (%d rows already updated)',
+                        self.table.name, self.pk.name, last_pk, total)
+
+        resumed_rows = total
+        started = time.monotonic()
+        while True:
+            batch_started = time.monotonic()
+            with self._transaction() as conn:
+                batch_end = self._next_batch_end(conn, last_pk)
+                if batch_end is None:
+                    break
+                query = update(self.table).where(self.pk <= batch_end).values(**self.values)
+                if last_pk is not None:
+                    query = query.where(self.pk > last_pk)
+                if self.where is not None:
+                    query = query.where(self.where)
+                total += conn.execute(query).rowcount
+            last_pk = batch_end
+            self._save_checkpoint(last_pk, total)
+
+            elapsed = time.monotonic() - batch_started
+            rate = (total - resumed_rows) / max(time.monotonic() - started, 1e-9)
+            logger.info('Backfill %s: %d rows, up to %s=%s, %.0f rows/sec',
+                        self.table.name, total, self.pk.name, last_pk, rate)
+            self._pause(elapsed)
+
+        if self.checkpoint_file and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+        logger.info('Backfill of %s finished: %d rows in %.1fs',
+                    self.table.name, total, time.monotonic() - started)
+        return total
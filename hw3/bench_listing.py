@@ -0,0 +1,78 @@
+"""Бенчмарк списков только для чтения: ORM-сущности против колонок.
+
+Запуск из корня репозитория:
+    DATABASE_URL=sqlite:///bench.db python -m hw3.bench_listing --rows 1000000
+"""
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import func, insert, select
+
+from hw3.alembic_sqlalchemy import Base, User, engine, get_session, iter_users
+
+
+def seed_users(rows: int) -> None:
+    """Заполняет users до нужного числа строк"""
+    with engine.begin() as conn:
+        existing = conn.execute(select(func.count()).select_from(User)).scalar()
+        for start in range(existing, rows, 10000):
+            conn.execute(insert(User), [
+                {'name': f'User{i}', 'email': f'user{i}@example.com', 'age': 18 + i % 60}
+                for i in range(start, min(start + 10000, rows))
+            ])
+
+
+def orm_entities() -> int:
+    """Прежний путь: полные ORM-объекты, затем копирование в словари"""
+    with get_session() as session:
+        users = session.query(User).all()
+        data = [{'id': u.id, 'name': u.name, 'email': u.email, 'age': u.age} for u in users]
+    return len(data)
+
+
+def column_mappings() -> int:
+    """Только нужные колонки сразу в словари через .mappings()"""
+    with get_session() as session:
+        query = select(User.id, User.name, User.email, User.age)
+        data = [dict(row) for row in session.execute(query).mappings()]
+    return len(data)
+
+
+def slots_rows() -> int:
+    """Потоковое чтение в __slots__-dataclass UserRow"""
+    return len(list(iter_users()))
+
+
+def measure(fn):
+    """Время выполнения (с) и пиковая память (МБ)"""
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    seed_users(args.rows)
+
+    print(f"{engine.dialect.name}, {args.rows} users")
+    baseline = None
+    for name, fn in [('ORM entities', orm_entities), ('mappings', column_mappings), ('slots rows', slots_rows)]:
+        elapsed, peak_mb = measure(fn)
+        baseline = baseline or (elapsed, peak_mb)
+        print(f"{name:>12}: {elapsed:6.2f} s ({baseline[0] / elapsed:.1f}x), "
+              f"peak {peak_mb:8.1f} MB ({baseline[1] / peak_mb:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
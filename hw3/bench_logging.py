@@ -0,0 +1,75 @@
+"""Бенчмарк накладных расходов построчного вывода в горячем пути.
+
+Сравнивает print на каждую строку, f-строки в логгере, ленивое
+логирование и очередь с прореживанием (hw3.structured_logging).
+
+Запуск из корня репозитория:
+    python -m hw3.bench_logging --rows 200000
+"""
+import argparse
+import logging
+import os
+import time
+
+from hw3.structured_logging import configure_logging, sampled, shutdown_logging
+
+logger = logging.getLogger('bench')
+
+
+def make_rows(count: int):
+    return [{'id': i, 'name': f'User{i}', 'email': f'user{i}@example.com', 'post_count': i % 7}
+            for i in range(count)]
+
+
+def print_rows(rows, sink):
+    for row in rows:
+        print(f"  - {row['name']} (ID: {row['id']}), Posts: {row['post_count']}", file=sink)
+
+
+def eager_fstring(rows, sink):
+    for row in rows:
+        logger.debug(f"  - {row['name']} (ID: {row['id']}), Posts: {row['post_count']}")
+
+
+def lazy_guarded(rows, sink):
+    if logger.isEnabledFor(logging.DEBUG):
+        for row in sampled(rows):
+            logger.debug('User row', extra={'row': row})
+
+
+def measure(fn, rows, sink) -> float:
+    """Наносекунд на строку"""
+    started = time.perf_counter_ns()
+    fn(rows, sink)
+    return (time.perf_counter_ns() - started) / len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--sink', default=os.devnull, help='куда писать вывод (по умолчанию /dev/null)')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    with open(args.sink, 'w') as sink:
+        results = {'print per row': measure(print_rows, rows, sink)}
+
+        configure_logging(level='INFO', stream=sink)
+        results['f-string, DEBUG off'] = measure(eager_fstring, rows, sink)
+        results['lazy, DEBUG off'] = measure(lazy_guarded, rows, sink)
+
+        configure_logging(level='DEBUG', stream=sink, use_queue=False, sample_every=1)
+        results['DEBUG on, sync, all rows'] = measure(lazy_guarded, rows, sink)
+
+        configure_logging(level='DEBUG', stream=sink, sample_every=100)
+        results['DEBUG on, queue, 1/100'] = measure(lazy_guarded, rows, sink)
+        shutdown_logging()
+
+    baseline = results['print per row']
+    print(f"{args.rows} rows, sink {args.sink}")
+    for name, ns in results.items():
+        print(f"{name:>26}: {ns:9.1f} ns/row ({baseline / ns:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Бенчмарк get_posts_by_user на большой таблице posts.
+
+Сравнивает задержку с индексом ix_posts_user_id и без него (полный
+просмотр таблицы или всех строк секции) и показывает, какие секции
+читает план. Для 100M постов в PostgreSQL:
+    DATABASE_URL=postgresql://... alembic upgrade head
+    DATABASE_URL=postgresql://... python -m hw3.bench_posts --posts 100000000 --without-index
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import func, insert, select, text
+
+from hw3.alembic_sqlalchemy import Base, Post, User, engine, get_posts_by_user
+from hw3.partitions import analyze_partitions, scanned_partitions
+
+SEED_CHUNK_SIZE = 10000
+
+
+def seed(users: int, posts: int) -> None:
+    """Заполняет users и posts до нужного числа строк"""
+    with engine.begin() as conn:
+        existing_users = conn.execute(select(func.count()).select_from(User)).scalar()
+        existing_posts = conn.execute(select(func.count()).select_from(Post)).scalar()
+        if engine.dialect.name == 'postgresql':
+            # generate_series на стороне сервера быстрее передачи строк из Python
+            conn.execute(text(
+                "INSERT INTO users (name, email, age) "
+                "SELECT 'User' || i, 'user' || i || '@example.com', 18 + i % 60 "
+                "FROM generate_series(:start, :stop - 1) AS i"
+            ), {'start': existing_users, 'stop': users})
+            conn.execute(text(
+                "INSERT INTO posts (title, content, user_id) "
+                "SELECT 'Post ' || i, 'Content ' || i, 1 + i % :users "
+                "FROM generate_series(:start, :stop - 1) AS i"
+            ), {'start': existing_posts, 'stop': posts, 'users': users})
+            return
+        for start in range(existing_users, users, SEED_CHUNK_SIZE):
+            conn.execute(insert(User), [
+                {'name': f'User{i}', 'email': f'user{i}@example.com', 'age': 18 + i % 60}
+                for i in range(start, min(start + SEED_CHUNK_SIZE, users))
+            ])
+        for start in range(existing_posts, posts, SEED_CHUNK_SIZE):
+            conn.execute(insert(Post), [
+                {'title': f'Post {i}', 'content': f'Content {i}', 'user_id': 1 + i % users}
+                for i in range(start, min(start + SEED_CHUNK_SIZE, posts))
+            ])
+
+
+def measure(user_ids) -> dict:
+    """Задержки get_posts_by_user в миллисекундах"""
+    latencies = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        get_posts_by_user(user_id)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'max': latencies[-1],
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(f"{name:>14}: p50 {result['p50']:9.2f} ms, p95 {result['p95']:9.2f} ms, "
+          f"max {result['max']:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--without-index', action='store_true',
+                        help='also measure after dropping ix_posts_user_id')
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    seed(args.users, args.posts)
+    if engine.dialect.name == 'postgresql':
+        analyze_partitions(engine)
+
+    user_ids = random.Random(42).sample(range(1, args.users + 1), min(args.queries, args.users))
+    print(f"{engine.dialect.name}, {args.users} users, {args.posts} posts, {len(user_ids)} queries")
+    print('Scanned:', ', '.join(scanned_partitions(user_ids[0], engine)))
+    report('with index', measure(user_ids))
+
+    if args.without_index:
+        index = next(index for index in Post.__table__.indexes if index.name == 'ix_posts_user_id')
+        index.drop(engine)
+        try:
+            print('Scanned:', ', '.join(scanned_partitions(user_ids[0], engine)))
+            report('without index', measure(user_ids[:max(len(user_ids) // 10, 1)]))
+        finally:
+            index.create(engine)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Бенчмарк поиска по имени: ILIKE '%...%' против индексного пути.
+
+Запуск из корня репозитория:
+    DATABASE_URL=sqlite:///bench.db python -m hw3.bench_search --rows 200000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from sqlalchemy import func, insert, select, text
+
+from hw3.alembic_sqlalchemy import (
+    Base, User, _ilike_pattern, _search_users_query, create_search_index, engine,
+)
+
+# Частые подстроки совпадают с большой долей таблицы, редкие - с единицами строк
+PATTERNS = {
+    'common': ['ann', 'ivan', 'olga'],
+    'selective': ['qzx', 'ivanabc', 'kwq', 'xyz'],
+}
+
+
+def seed_users(rows: int) -> None:
+    """Заполняет users случайными именами, если таблица пуста"""
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(User)).scalar():
+            return
+        names = ['Ivan', 'Petr', 'Anna', 'Olga', 'Sergey', 'Maria', 'Dmitry', 'Elena']
+        for start in range(0, rows, 10000):
+            conn.execute(insert(User), [
+                {
+                    'name': f"{random.choice(names)}{''.join(random.choices(string.ascii_lowercase, k=6))}",
+                    'email': f'user{i}@example.com',
+                    'age': random.randint(18, 80),
+                }
+                for i in range(start, min(start + 10000, rows))
+            ])
+
+
+def drop_search_index(bind) -> None:
+    """Убирает индекс поиска, чтобы базовый ILIKE шел последовательным просмотром"""
+    with bind.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(text("DROP INDEX IF EXISTS ix_users_name_trgm"))
+        elif conn.dialect.name == 'sqlite':
+            for trigger in ('users_name_fts_ai', 'users_name_fts_ad', 'users_name_fts_au'):
+                conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            conn.execute(text("DROP TABLE IF EXISTS users_name_fts"))
+
+
+def measure(build_query, patterns, repeat: int) -> float:
+    """Медианная задержка запроса в миллисекундах"""
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            for pattern in patterns:
+                started = time.perf_counter()
+                conn.execute(build_query(pattern)).all()
+                timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(engine)
+    seed_users(args.rows)
+
+    # Прежняя реализация с тем же лимитом: ILIKE без индекса, последовательный просмотр users
+    drop_search_index(engine)
+    ilike_ms = {
+        kind: measure(
+            lambda p: select(User).where(User.name.ilike(_ilike_pattern(p), escape='\\')).limit(args.limit),
+            patterns, args.repeat,
+        )
+        for kind, patterns in PATTERNS.items()
+    }
+    create_search_index(engine)
+    indexed_ms = {
+        kind: measure(lambda p: _search_users_query(engine, p, args.limit), patterns, args.repeat)
+        for kind, patterns in PATTERNS.items()
+    }
+
+    print(f"{engine.dialect.name}, {args.rows} users, limit {args.limit}")
+    for kind in PATTERNS:
+        print(f"{kind:>9}: ILIKE {ilike_ms[kind]:8.2f} ms, indexed {indexed_ms[kind]:8.2f} ms "
+              f"({ilike_ms[kind] / indexed_ms[kind]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""Импорт и экспорт users/posts через COPY.
+
+В PostgreSQL строки идут потоком через ``COPY ... FROM STDIN`` /
+``COPY ... TO STDOUT`` (CSV или binary) без построчных INSERT и без
+загрузки всего файла в память; работает и с psycopg2, и с psycopg 3.
+В SQLite COPY нет, вместо него пакетный executemany.
+
+Запуск из корня репозитория:
+    python -m hw3.copy_io export users users.csv
+    python -m hw3.copy_io export posts posts.bin --format binary
+    python -m hw3.copy_io import users users.csv
+    python -m hw3.copy_io generate 1000000 --compare-orm 2000
+"""
+import argparse
+import codecs
+import csv
+import io
+import logging
+import time
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy import Table, insert, select, text
+from sqlalchemy.engine import Engine
+
+from hw3.alembic_sqlalchemy import (
+    BULK_INSERT_BATCH_SIZE, STREAM_BATCH_SIZE, Base, Post, User, create_user, engine,
+)
+from hw3.structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, доступные для импорта и экспорта
+TABLES = {'users': User.__table__, 'posts': Post.__table__}
+FORMATS = ('csv', 'binary')
+# Размер куска, который COPY читает или пишет за раз
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+class RowStream(io.RawIOBase):
+    """Файлоподобная обертка над генератором строк: отдает их как CSV по запросу.
+
+    copy_expert читает поток через read(size), поэтому в памяти одновременно
+    находится только один кусок CSV, а не весь набор строк.
+    """
+
+    def __init__(self, rows: Iterable[Sequence], header: Optional[Sequence[str]] = None):
+        self._rows = iter(rows)
+        self._text = io.StringIO()
+        self._writer = csv.writer(self._text, lineterminator='\n')
+        self._buffer = b''
+        if header:
+            self._writer.writerow(header)
+        self.rows = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def _fill(self, size: int) -> None:
+        for row in self._rows:
+            self._writer.writerow(row)
+            self.rows += 1
+            if self._text.tell() >= size:
+                break
+        self._buffer += self._text.getvalue().encode()
+        self._text.seek(0)
+        self._text.truncate()
+
+    def read(self, size: int = -1) -> bytes:
+        size = COPY_CHUNK_SIZE if size is None or size < 0 else size
+        if len(self._buffer) < size:
+            self._fill(size)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def _table(name: str) -> Table:
+    if name not in TABLES:
+        raise ValueError(f'Unknown table {name!r}, expected one of {sorted(TABLES)}')
+    return TABLES[name]
+
+
+def _copy_sql(table: Table, direction: str, fmt: str) -> str:
+    """Текст COPY; имена таблиц и колонок берутся только из метаданных моделей"""
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown format {fmt!r}, expected one of {FORMATS}')
+    columns = ', '.join(column.name for column in table.columns)
+    options = 'FORMAT binary' if fmt == 'binary' else 'FORMAT csv, HEADER'
+    return f'COPY {table.name} ({columns}) {direction} WITH ({options})'
+
+
+def _reset_sequence(conn, table: Table) -> None:
+    """После COPY с явными id последовательность нужно сдвинуть за максимальный id"""
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+        f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+    ))
+
+
+def _postgres_copy_in(bind: Engine, sql: str, source: BinaryIO) -> int:
+    raw = bind.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if bind.dialect.driver == 'psycopg':
+            with cursor.copy(sql) as copy:
+                while data := source.read(COPY_CHUNK_SIZE):
+                    copy.write(data)
+        else:
+            cursor.copy_expert(sql, source, size=COPY_CHUNK_SIZE)
+        rows = cursor.rowcount
+        cursor.close()
+        raw.commit()
+        return rows
+    finally:
+        raw.close()
+
+
+def _postgres_copy_out(bind: Engine, sql: str, target: BinaryIO) -> int:
+    raw = bind.raw_connection()
+    try:
+        cursor = raw.cursor()
+        if bind.dialect.driver == 'psycopg':
+            with cursor.copy(sql) as copy:
+                for data in copy:
+                    target.write(data)
+        else:
+            cursor.copy_expert(sql, target, size=COPY_CHUNK_SIZE)
+        rows = cursor.rowcount
+        cursor.close()
+        raw.commit()
+        return rows
+    finally:
+        raw.close()
+
+
+def _csv_rows(source: BinaryIO, table: Table) -> Iterator[dict]:
+    """Строки CSV как словари; пустое значение без кавычек считается NULL, как в COPY"""
+    reader = csv.reader(codecs.getreader('utf-8')(source))
+    header = next(reader, None)
+    if header is None:
+        return
+    unknown = set(header) - set(table.columns.keys())
+    if unknown:
+        raise ValueError(f'Unknown columns for {table.name}: {sorted(unknown)}')
+    for row in reader:
+        yield {column: value if value != '' else None for column, value in zip(header, row)}
+
+
+def _executemany(bind: Engine, table: Table, rows: Iterator[dict],
+                 batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+    total = 0
+    with bind.begin() as conn:
+        while batch := list(islice(rows, batch_size)):
+            conn.execute(insert(table), batch)
+            total += len(batch)
+    return total
+
+
+def import_file(table_name: str, source: BinaryIO, fmt: str = 'csv', bind: Engine = engine) -> int:
+    """Загружает файл (бинарный режим) в таблицу и возвращает число строк"""
+    table = _table(table_name)
+    if bind.dialect.name == 'postgresql':
+        rows = _postgres_copy_in(bind, _copy_sql(table, 'FROM STDIN', fmt), source)
+        with bind.begin() as conn:
+            _reset_sequence(conn, table)
+        return rows
+    if fmt != 'csv':
+        raise ValueError('Binary COPY format is supported by PostgreSQL only')
+    return _executemany(bind, table, _csv_rows(source, table))
+
+
+def import_rows(table_name: str, rows: Iterable[Sequence], columns: Sequence[str],
+                bind: Engine = engine) -> int:
+    """Загружает строки из генератора (кортежи в порядке columns) без материализации"""
+    table = _table(table_name)
+    if bind.dialect.name == 'postgresql':
+        column_list = ', '.join(table.columns[column].name for column in columns)
+        sql = f'COPY {table.name} ({column_list}) FROM STDIN WITH (FORMAT csv)'
+        stream = RowStream(rows)
+        _postgres_copy_in(bind, sql, stream)
+        if 'id' in columns:
+            with bind.begin() as conn:
+                _reset_sequence(conn, table)
+        return stream.rows
+    return _executemany(bind, table, (dict(zip(columns, row)) for row in rows))
+
+
+def export_file(table_name: str, target: BinaryIO, fmt: str = 'csv', bind: Engine = engine) -> int:
+    """Выгружает таблицу в файл (бинарный режим) и возвращает число строк"""
+    table = _table(table_name)
+    if bind.dialect.name == 'postgresql':
+        return _postgres_copy_out(bind, _copy_sql(table, 'TO STDOUT', fmt), target)
+    if fmt != 'csv':
+        raise ValueError('Binary COPY format is supported by PostgreSQL only')
+
+    out = io.TextIOWrapper(target, encoding='utf-8', newline='', write_through=True)
+    writer = csv.writer(out, lineterminator='\n')
+    writer.writerow(table.columns.keys())
+    rows = 0
+    with bind.connect() as conn:
+        result = conn.execution_options(yield_per=STREAM_BATCH_SIZE).execute(
+            select(table).order_by(*table.primary_key.columns)
+        )
+        for partition in result.partitions():
+            writer.writerows(partition)
+            rows += len(partition)
+    out.detach()
+    return rows
+
+
+def generate_users(count: int, start: int = 0) -> Iterator[tuple]:
+    """Синтетические пользователи (name, email, age)"""
+    for i in range(start, start + count):
+        yield f'User{i}', f'user{i}@example.com', 18 + i % 60
+
+
+def _report(action: str, rows: int, elapsed: float) -> float:
+    rate = rows / max(elapsed, 1e-9)
+    print(f'{action}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)')
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='COPY based import/export for users and posts')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name in ('import', 'export'):
+        command = commands.add_parser(name)
+        command.add_argument('table', choices=sorted(TABLES))
+        command.add_argument('path')
+        command.add_argument('--format', choices=FORMATS, default='csv')
+    generate_cmd = commands.add_parser('generate', help='import synthetic users from a generator')
+    generate_cmd.add_argument('count', type=int)
+    generate_cmd.add_argument('--compare-orm', type=int, default=0, metavar='N',
+                              help='also insert N users one by one through create_user')
+    args = parser.parse_args()
+
+    if getattr(args, 'format', 'csv') == 'binary' and engine.dialect.name != 'postgresql':
+        parser.error('binary format requires PostgreSQL')
+    configure_logging(level='WARNING')
+    Base.metadata.create_all(engine)
+    started = time.perf_counter()
+    if args.command == 'import':
+        with open(args.path, 'rb') as source:
+            rows = import_file(args.table, source, args.format)
+        _report(f'Imported {args.table}', rows, time.perf_counter() - started)
+    elif args.command == 'export':
+        with open(args.path, 'wb') as target:
+            rows = export_file(args.table, target, args.format)
+        _report(f'Exported {args.table}', rows, time.perf_counter() - started)
+    else:
+        rows = import_rows('users', generate_users(args.count), ('name', 'email', 'age'))
+        copy_rate = _report('Bulk import', rows, time.perf_counter() - started)
+        if args.compare_orm:
+            started = time.perf_counter()
+            for name, email, age in generate_users(args.compare_orm, start=args.count):
+                create_user(age, name, email)
+            orm_rate = _report('create_user', args.compare_orm, time.perf_counter() - started)
+            print(f'Speedup: {copy_rate / orm_rate:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Обслуживание секционированной таблицы posts (PostgreSQL, HASH по user_id).
+
+- stats: строки и размер по секциям, перекос хеш-распределения;
+- analyze: autovacuum не собирает статистику родительской таблицы,
+  поэтому ANALYZE родителя нужно запускать вручную после больших загрузок;
+- vacuum: VACUUM (ANALYZE) каждой секции по очереди, чтобы не держать
+  одну длинную операцию на всю таблицу;
+- explain: какие секции читает get_posts_by_user (проверка отсечения секций).
+
+Запуск из корня репозитория:
+    DATABASE_URL=postgresql://... python -m hw3.partitions stats
+    DATABASE_URL=postgresql://... python -m hw3.partitions explain --user-id 42
+"""
+import argparse
+import logging
+import re
+import time
+from typing import List
+
+from sqlalchemy import select, text
+from sqlalchemy.engine import Engine
+
+from hw3.alembic_sqlalchemy import Post, engine
+from hw3.structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_QUERY = text("""
+    SELECT child.relname AS name,
+           pg_get_expr(child.relpartbound, child.oid) AS bound,
+           GREATEST(child.reltuples, 0)::bigint AS rows,
+           pg_total_relation_size(child.oid) AS size
+    FROM pg_inherits
+    JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE parent.relname = :table
+    ORDER BY child.relname
+""")
+
+
+def _quote(bind: Engine, name: str) -> str:
+    return bind.dialect.identifier_preparer.quote(name)
+
+
+def partition_stats(bind: Engine = engine, table: str = 'posts') -> List[dict]:
+    """Секции таблицы с оценкой числа строк (по статистике) и размером в байтах.
+
+    Для несекционированной таблицы и не-PostgreSQL возвращает пустой список.
+    """
+    if bind.dialect.name != 'postgresql':
+        return []
+    with bind.connect() as conn:
+        return [dict(row) for row in conn.execute(PARTITIONS_QUERY, {'table': table}).mappings()]
+
+
+def skewed_partitions(stats: List[dict], factor: float = 2.0) -> List[dict]:
+    """Секции, в которых строк больше среднего в factor раз (горячие user_id)"""
+    if not stats:
+        return []
+    average = sum(part['rows'] for part in stats) / len(stats)
+    return [part for part in stats if average and part['rows'] > average * factor]
+
+
+def analyze_partitions(bind: Engine = engine, table: str = 'posts') -> None:
+    """ANALYZE родительской таблицы (заодно обходит и все секции)"""
+    started = time.monotonic()
+    with bind.begin() as conn:
+        conn.execute(text(f'ANALYZE {_quote(bind, table)}'))
+    logger.info('ANALYZE %s took %.1fs', table, time.monotonic() - started)
+
+
+def vacuum_partitions(bind: Engine = engine, table: str = 'posts') -> None:
+    """VACUUM (ANALYZE) по секциям; VACUUM не работает внутри транзакции"""
+    with bind.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for part in partition_stats(bind, table):
+            started = time.monotonic()
+            conn.execute(text(f'VACUUM (ANALYZE) {_quote(bind, part["name"])}'))
+            logger.info('VACUUM %s (%d rows) took %.1fs',
+                        part['name'], part['rows'], time.monotonic() - started)
+
+
+def explain_posts_by_user(user_id: int, bind: Engine = engine) -> str:
+    """План запроса get_posts_by_user"""
+    query = select(Post.id, Post.title, Post.content).where(Post.user_id == user_id).order_by(Post.id)
+    compiled = query.compile(bind, compile_kwargs={'literal_binds': True})
+    explain = 'EXPLAIN QUERY PLAN' if bind.dialect.name == 'sqlite' else 'EXPLAIN'
+    with bind.connect() as conn:
+        return '\n'.join(str(row[-1]) for row in conn.execute(text(f'{explain} {compiled}')))
+
+
+def scanned_partitions(user_id: int, bind: Engine = engine) -> List[str]:
+    """Таблицы (секции), которые план get_posts_by_user реально читает"""
+    plan = explain_posts_by_user(user_id, bind)
+    logger.debug('Plan for user %s:\n%s', user_id, plan)
+    # PostgreSQL: "Index Scan using ... on posts_p3 posts", SQLite: "SEARCH posts USING ..."
+    return re.findall(r'\b(?:on|SCAN|SEARCH) (\w+)', plan)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Partition maintenance for posts')
+    parser.add_argument('command', choices=['stats', 'analyze', 'vacuum', 'explain'])
+    parser.add_argument('--table', default='posts')
+    parser.add_argument('--user-id', type=int, default=1)
+    args = parser.parse_args()
+
+    configure_logging(level='INFO')
+    if args.command == 'stats':
+        stats = partition_stats(engine, args.table)
+        if not stats:
+            print(f'{args.table} is not partitioned')
+        hot = {part['name'] for part in skewed_partitions(stats)}
+        for part in stats:
+            mark = ' skewed' if part['name'] in hot else ''
+            print(f"{part['name']:>12} {part['bound']:<40} {part['rows']:>12} rows "
+                  f"{part['size'] / 2 ** 20:10.1f} MB{mark}")
+    elif args.command == 'analyze':
+        analyze_partitions(engine, args.table)
+    elif args.command == 'vacuum':
+        vacuum_partitions(engine, args.table)
+    else:
+        print(explain_posts_by_user(args.user_id, engine))
+        print('Scanned:', ', '.join(scanned_partitions(args.user_id, engine)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,365 @@
+"""Профилирование горячих путей со сбором стеков для flamegraph.
+
+Включается переменной окружения PROFILE=1 (или enable()); выключенное
+профилирование стоит одной проверки флага. Внутри profile()/@profiled:
+- один на процесс фоновый поток раз в PROFILE_INTERVAL секунд снимает
+  стеки всех потоков, находящихся внутри profile(), и копит их в общем
+  счетчике collapsed stacks («get_session;get_all_users;execute 42»),
+  пригодных для flamegraph.pl, speedscope и inferno;
+- время каждого имени профиля делится на ожидание БД (события курсора
+  SQLAlchemy и CommandListener pymongo), сериализацию (участки
+  section('serialize')) и остальной Python.
+
+Стеки и итоги накапливаются за весь процесс и пишутся одним файлом
+PROFILE_DIR/profile-<pid>-<n>.collapsed при flush() или при выходе.
+
+Классы, помеченные @auto_profile (DatabaseManager из hw2, UserManager из
+hw4), при PROFILE=1 или после enable() профилируются целиком.
+
+Пример:
+    PROFILE=1 python -m hw3.bench_listing
+
+    from hw3.profiling import flush, profile, profile_methods
+    profile_methods(ShardedUsers)             # все публичные методы
+    with profile('report'):
+        build_report()
+    flush()                                   # не дожидаясь выхода
+"""
+import atexit
+import functools
+import inspect
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.getenv('PROFILE', '') not in ('', '0', 'false')
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+
+_local = threading.local()
+_run_numbers = itertools.count(1)
+_hooks_lock = threading.Lock()
+_hooks_installed = False
+# классы, помеченные @auto_profile; enable() оборачивает их методы
+_auto_targets = []
+
+
+class ProfileRun:
+    """Один вызов profile(): разбивка времени для итогов по имени"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.db_seconds = 0.0
+        self.db_calls = 0
+        self.sections: Dict[str, float] = Counter()
+        self.started = time.perf_counter()
+
+
+class _Profiler:
+    """Общие для процесса стеки, итоги по именам профилей и поток-сэмплер"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stacks: Counter = Counter()
+        self.totals: Dict[str, Counter] = defaultdict(Counter)
+        # id потока -> имя внешнего profile(), в котором он сейчас находится
+        self.active: Dict[int, str] = {}
+        # установлено, пока active не пуст: простаивающий сэмплер ждет его
+        self.has_active = threading.Event()
+        self.sampler: Optional[threading.Thread] = None
+        self.sampler_pid = None
+
+    def ensure_sampler(self) -> None:
+        """Запускает поток-сэмплер один раз (и заново в дочернем процессе после fork)"""
+        if self.sampler_pid == os.getpid():
+            return
+        with self.lock:
+            if self.sampler_pid == os.getpid():
+                return
+            self.stacks.clear()
+            self.totals.clear()
+            self.active.clear()
+            self.has_active = threading.Event()  # после fork состояние события не гарантировано
+            self.sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+            self.sampler_pid = os.getpid()
+            self.sampler.start()
+        atexit.register(flush)
+
+    def _sample_loop(self):
+        while True:
+            self.has_active.wait()
+            time.sleep(PROFILE_INTERVAL)
+            if not self.active:
+                continue
+            frames = sys._current_frames()
+            with self.lock:
+                for thread_id, name in list(self.active.items()):
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        self.stacks[f'{name};{_format_stack(frame)}'] += 1
+
+    def enter(self, name: str) -> None:
+        with self.lock:
+            self.active[threading.get_ident()] = name
+            self.has_active.set()
+
+    def leave(self, run: ProfileRun) -> None:
+        elapsed = time.perf_counter() - run.started
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+            if not self.active:
+                self.has_active.clear()
+            totals = self.totals[run.name]
+            totals['calls'] += 1
+            totals['total_seconds'] += elapsed
+            totals['db_seconds'] += run.db_seconds
+            totals['db_calls'] += run.db_calls
+            for section_name, seconds in run.sections.items():
+                totals[f'{section_name}_seconds'] += seconds
+
+    def take(self):
+        """Забирает накопленные стеки и итоги, обнуляя их"""
+        with self.lock:
+            stacks, self.stacks = self.stacks, Counter()
+            totals, self.totals = self.totals, defaultdict(Counter)
+        return stacks, totals
+
+
+_profiler = _Profiler()
+
+
+def _format_stack(frame) -> str:
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f'{code.co_qualname} ({os.path.basename(code.co_filename)})')
+        frame = frame.f_back
+    return ';'.join(reversed(frames))
+
+
+def _current_run() -> Optional[ProfileRun]:
+    return getattr(_local, 'run', None)
+
+
+def summary(totals: Optional[Dict[str, Counter]] = None) -> Dict[str, dict]:
+    """Итоги по именам профилей в миллисекундах (по умолчанию — накопленные сейчас)"""
+    if totals is None:
+        with _profiler.lock:
+            totals = {name: Counter(values) for name, values in _profiler.totals.items()}
+    result = {}
+    for name, values in totals.items():
+        sections = {key[:-len('_seconds')]: seconds for key, seconds in values.items()
+                    if key.endswith('_seconds') and key not in ('total_seconds', 'db_seconds')}
+        python_seconds = values['total_seconds'] - values['db_seconds'] - sum(sections.values())
+        result[name] = {
+            'calls': values['calls'],
+            'total_ms': values['total_seconds'] * 1000,
+            'db_ms': values['db_seconds'] * 1000,
+            'db_calls': values['db_calls'],
+            **{f'{section}_ms': seconds * 1000 for section, seconds in sections.items()},
+            'python_ms': max(python_seconds, 0.0) * 1000,
+        }
+    return result
+
+
+def flush(directory: Optional[str] = None) -> Optional[str]:
+    """Пишет накопленные стеки в один .collapsed-файл, логирует итоги и обнуляет их"""
+    if _profiler.sampler_pid != os.getpid():
+        return None
+    stacks, totals = _profiler.take()
+    if not stacks and not totals:
+        return None
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'profile-{os.getpid()}-{next(_run_numbers)}.collapsed')
+    with open(path, 'w') as f:
+        for stack, count in stacks.most_common():
+            f.write(f'{stack} {count}\n')
+    for name, values in summary(totals).items():
+        logger.info('Profile %s', name, extra={'profile': name, **values})
+    logger.info('Profile stacks written to %s', path, extra={'samples': sum(stacks.values())})
+    return path
+
+
+# ---------- учет ожидания БД ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_run() is not None:
+        conn.info.setdefault('profile_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    run = _current_run()
+    started = conn.info.get('profile_started')
+    if run is not None and started:
+        run.db_seconds += time.perf_counter() - started.pop()
+        run.db_calls += 1
+
+
+def _handle_error(exception_context):
+    """Ошибка execute: after_cursor_execute не вызовется, снимаем отметку здесь"""
+    conn = exception_context.connection
+    started = conn.info.get('profile_started') if conn is not None else None
+    if started:
+        started_at = started.pop()
+        run = _current_run()
+        if run is not None:
+            run.db_seconds += time.perf_counter() - started_at
+            run.db_calls += 1
+
+
+def _install_hooks():
+    """Подключает счетчики БД один раз: SQLAlchemy для всех Engine, pymongo глобально.
+
+    CommandListener pymongo действует только на клиенты, созданные после
+    первого запуска профилирования.
+    """
+    global _hooks_installed
+    with _hooks_lock:
+        if _hooks_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        try:
+            from pymongo import monitoring
+        except ImportError:
+            pass
+        else:
+            monitoring.register(_MongoCommandListener())
+        _hooks_installed = True
+
+
+try:
+    from pymongo.monitoring import CommandListener
+except ImportError:  # pymongo не установлен
+    CommandListener = object
+
+
+class _MongoCommandListener(CommandListener):
+    """Время команд MongoDB; колбэки вызываются в потоке, отправившем команду"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        self._record(event)
+
+    def _record(self, event):
+        run = _current_run()
+        if run is not None:
+            run.db_seconds += event.duration_micros / 1e6
+            run.db_calls += 1
+
+
+# ---------- публичный интерфейс ----------
+
+def enable(interval: Optional[float] = None, directory: Optional[str] = None) -> None:
+    """Включает профилирование без переменной окружения"""
+    global ENABLED, PROFILE_INTERVAL, PROFILE_DIR
+    ENABLED = True
+    PROFILE_INTERVAL = interval or PROFILE_INTERVAL
+    PROFILE_DIR = directory or PROFILE_DIR
+    for target in _auto_targets:
+        profile_methods(target)
+
+
+def disable() -> None:
+    global ENABLED
+    ENABLED = False
+
+
+@contextmanager
+def profile(name: str):
+    """Профилирует блок; вложенные вызовы учитываются во внешнем"""
+    if not ENABLED or _current_run() is not None:
+        yield _current_run()
+        return
+
+    _install_hooks()
+    _profiler.ensure_sampler()
+    run = ProfileRun(name)
+    _local.run = run
+    _profiler.enter(name)
+    try:
+        yield run
+    finally:
+        _local.run = None
+        _profiler.leave(run)
+
+
+@contextmanager
+def section(name: str):
+    """Отдельно учитываемый участок внутри профиля, например 'serialize'"""
+    run = _current_run()
+    if run is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.sections[name] += time.perf_counter() - started
+
+
+def profiled(name: Optional[str] = None):
+    """Декоратор: профилирует каждый вызов функции"""
+    def decorator(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with profile(label):
+                return fn(*args, **kwargs)
+        wrapper.__profiled__ = True
+        return wrapper
+    return decorator
+
+
+def profile_methods(target, names: Optional[Iterable[str]] = None):
+    """Оборачивает публичные методы класса или экземпляра в @profiled.
+
+    Классы с @auto_profile оборачиваются сами; для остальных:
+        profile_methods(ShardedUsers)
+        profile_methods(manager, ['get_active_by_city'])
+    """
+    cls = target if isinstance(target, type) else type(target)
+    names = names or [name for name in dir(cls)
+                      if not name.startswith('_') and callable(getattr(cls, name))]
+    for name in names:
+        if isinstance(target, type):
+            method = inspect.getattr_static(target, name)
+            if not inspect.isfunction(method):
+                continue  # staticmethod, classmethod, свойства
+        else:
+            method = getattr(target, name)
+        if not getattr(method, '__profiled__', False):
+            setattr(target, name, profiled(f'{cls.__name__}.{name}')(method))
+    return target
+
+
+def auto_profile(cls):
+    """Декоратор класса: публичные методы профилируются, когда профилирование включено.
+
+    При PROFILE=1 методы оборачиваются сразу, иначе — при вызове enable().
+    """
+    _auto_targets.append(cls)
+    if ENABLED:
+        profile_methods(cls)
+    return cls
@@ -0,0 +1,247 @@
+"""Горизонтальное шардирование users/posts по user_id.
+
+Пользователь и все его посты живут на одном шарде, номер которого
+вычисляется jump consistent hash от user_id: при добавлении шарда
+переезжает только ~1/N пользователей. Глобальные id пользователей
+и постов выдают таблицы user_ids и post_ids на шарде 0, поэтому при
+rebalance он остается первым в списке, а переезжающие записи сохраняют
+свои id.
+
+Запуск из корня репозитория:
+    python -m hw3.sharding init --shards sqlite:///s0.db,sqlite:///s1.db
+    python -m hw3.sharding rebalance --from sqlite:///s0.db,sqlite:///s1.db \\
+        --to sqlite:///s0.db,sqlite:///s1.db,sqlite:///s2.db
+"""
+import argparse
+import heapq
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, delete, event, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from hw3.alembic_sqlalchemy import (
+    BULK_INSERT_BATCH_SIZE, Base, Post, User, _enable_sqlite_foreign_keys, _insert_posts,
+    _search_users_query,
+)
+from hw3.structured_logging import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Последовательности глобальных id пользователей и постов (только на шарде 0)
+id_metadata = MetaData()
+user_ids = Table('user_ids', id_metadata, Column('id', Integer, primary_key=True, autoincrement=True))
+post_ids = Table('post_ids', id_metadata, Column('id', Integer, primary_key=True, autoincrement=True))
+
+USER_COLUMNS = (User.id, User.name, User.email, User.age)
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping, Veach): номер корзины для ключа"""
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+
+class ShardRouter:
+    """Набор шардов и маршрутизация по user_id"""
+
+    def __init__(self, urls: List[str], max_workers: Optional[int] = None):
+        if not urls:
+            raise ValueError('At least one shard URL is required')
+        self.urls = list(urls)
+        self.engines = []
+        for url in self.urls:
+            engine = create_engine(url)
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _enable_sqlite_foreign_keys)
+            self.engines.append(engine)
+        self.sessions = [
+            sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+            for engine in self.engines
+        ]
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(self.engines))
+
+    def shard_for(self, user_id: int) -> int:
+        return jump_hash(user_id, len(self.engines))
+
+    @contextmanager
+    def session(self, shard: int):
+        """Сессия шарда с коммитом или откатом"""
+        session = self.sessions[shard]()
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def create_all(self):
+        """Создает таблицы на всех шардах и последовательность id на шарде 0"""
+        for engine in self.engines:
+            Base.metadata.create_all(engine)
+        id_metadata.create_all(self.engines[0])
+
+    def next_user_id(self) -> int:
+        """Выдает новый глобальный id пользователя"""
+        with self.session(0) as session:
+            return session.execute(insert(user_ids).returning(user_ids.c.id)).scalar_one()
+
+    def next_post_ids(self, count: int) -> List[int]:
+        """Выдает count новых глобальных id постов"""
+        if not count:
+            return []
+        with self.session(0) as session:
+            return list(session.scalars(
+                insert(post_ids).returning(post_ids.c.id, sort_by_parameter_order=True),
+                [{}] * count,
+            ))
+
+    def scatter(self, fn) -> List:
+        """Выполняет fn(session) на всех шардах параллельно"""
+        def run(shard: int):
+            with self.session(shard) as session:
+                return fn(session)
+        return list(self.executor.map(run, range(len(self.engines))))
+
+    def dispose(self):
+        self.executor.shutdown()
+        for engine in self.engines:
+            engine.dispose()
+
+
+class ShardedUsers:
+    """CRUD пользователей и постов поверх ShardRouter"""
+
+    def __init__(self, router: ShardRouter):
+        self.router = router
+
+    def create_user(self, name: str, email: str, age: int, user_id: Optional[int] = None) -> int:
+        user_id = user_id if user_id is not None else self.router.next_user_id()
+        with self.router.session(self.router.shard_for(user_id)) as session:
+            session.execute(insert(User).values(id=user_id, name=name, email=email, age=age))
+        logger.info('Created user %s on shard %d', user_id, self.router.shard_for(user_id))
+        return user_id
+
+    def create_posts(self, user_id: int, posts_data: Iterable[dict]) -> List[int]:
+        posts_data = list(posts_data)
+        ids = self.router.next_post_ids(len(posts_data))
+        posts = [{**post_data, 'id': post_id} for post_data, post_id in zip(posts_data, ids)]
+        with self.router.session(self.router.shard_for(user_id)) as session:
+            _insert_posts(session, posts, user_id)
+        return ids
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        with self.router.session(self.router.shard_for(user_id)) as session:
+            row = session.execute(select(*USER_COLUMNS).where(User.id == user_id)).mappings().first()
+            return dict(row) if row else None
+
+    def get_posts_by_user(self, user_id: int) -> List[dict]:
+        query = select(Post.id, Post.title, Post.content).where(Post.user_id == user_id).order_by(Post.id)
+        with self.router.session(self.router.shard_for(user_id)) as session:
+            return [dict(row) for row in session.execute(query).mappings()]
+
+    def delete_user(self, user_id: int) -> bool:
+        with self.router.session(self.router.shard_for(user_id)) as session:
+            return bool(session.execute(delete(User).where(User.id == user_id)).rowcount)
+
+    def get_all_users(self, limit: Optional[int] = None) -> List[dict]:
+        """Все пользователи со всех шардов, упорядоченные по id"""
+        query = select(*USER_COLUMNS).order_by(User.id).limit(limit)
+        parts = self.router.scatter(lambda s: [dict(row) for row in s.execute(query).mappings()])
+        merged = heapq.merge(*parts, key=lambda user: user['id'])
+        return list(merged)[:limit] if limit is not None else list(merged)
+
+    def search_users_by_name(self, name_pattern: str, limit: Optional[int] = None) -> List[dict]:
+        """Поиск по имени на всех шардах, результат упорядочен по (name, id)"""
+        def search(session):
+            query = _search_users_query(session.get_bind(), name_pattern, limit)
+            query = query.order_by(None).order_by(User.name, User.id)
+            return [dict(row) for row in session.execute(query).mappings()]
+
+        merged = heapq.merge(*self.router.scatter(search), key=lambda user: (user['name'], user['id']))
+        return list(merged)[:limit] if limit is not None else list(merged)
+
+
+def rebalance(source: ShardRouter, target: ShardRouter, batch_size: int = BULK_INSERT_BATCH_SIZE) -> int:
+    """Переносит пользователей (с постами), чей шард изменился, и возвращает их число"""
+    if source.urls[0] != target.urls[0]:
+        raise ValueError('Shard 0 holds the user id sequence and must stay first')
+    target_index = {url: i for i, url in enumerate(target.urls)}
+    moved = 0
+    started = time.monotonic()
+    for shard, url in enumerate(source.urls):
+        last_id = 0
+        while True:
+            with source.session(shard) as session:
+                users = session.execute(
+                    select(*USER_COLUMNS).where(User.id > last_id).order_by(User.id).limit(batch_size)
+                ).mappings().all()
+            if not users:
+                break
+            last_id = users[-1]['id']
+
+            moves: Dict[int, List[dict]] = {}
+            for user in users:
+                new_shard = target.shard_for(user['id'])
+                if target_index.get(url) != new_shard:
+                    moves.setdefault(new_shard, []).append(dict(user))
+
+            for new_shard, batch in moves.items():
+                ids = [user['id'] for user in batch]
+                with source.session(shard) as session:
+                    posts = session.execute(
+                        select(Post.id, Post.title, Post.content, Post.user_id).where(Post.user_id.in_(ids))
+                    ).mappings().all()
+                # Сначала копия на новом шарде, затем удаление со старого:
+                # при сбое между шагами повторный запуск найдет дубликат по id
+                with target.session(new_shard) as session:
+                    session.execute(delete(User).where(User.id.in_(ids)))
+                    session.execute(insert(User), batch)
+                    _insert_posts(session, (dict(post) for post in posts))
+                with source.session(shard) as session:
+                    session.execute(delete(Post).where(Post.user_id.in_(ids)))
+                    session.execute(delete(User).where(User.id.in_(ids)))
+                moved += len(batch)
+            logger.info('Rebalance: shard %d up to user %s, moved %d users (%.0f users/sec)',
+                        shard, last_id, moved, moved / max(time.monotonic() - started, 1e-9))
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharding tools for users/posts')
+    commands = parser.add_subparsers(dest='command', required=True)
+    init_cmd = commands.add_parser('init', help='create tables on all shards')
+    init_cmd.add_argument('--shards', required=True, help='comma separated shard URLs')
+    rebalance_cmd = commands.add_parser('rebalance', help='move users to their new shards')
+    rebalance_cmd.add_argument('--from', dest='source', required=True, help='current shard URLs')
+    rebalance_cmd.add_argument('--to', dest='target', required=True, help='new shard URLs')
+    rebalance_cmd.add_argument('--batch-size', type=int, default=BULK_INSERT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    configure_logging(level='INFO')
+    if args.command == 'init':
+        router = ShardRouter(args.shards.split(','))
+        router.create_all()
+        router.dispose()
+    else:
+        source = ShardRouter(args.source.split(','))
+        target = ShardRouter(args.target.split(','))
+        target.create_all()
+        moved = rebalance(source, target, args.batch_size)
+        print(f'Moved {moved} users')
+        source.dispose()
+        target.dispose()
+
+
+if __name__ == '__main__':
+    main()
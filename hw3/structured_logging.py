@@ -0,0 +1,117 @@
+"""Структурированное логирование без блокировки рабочих потоков.
+
+- уровень и формат задаются параметрами или переменными окружения
+  LOG_LEVEL (INFO), LOG_FORMAT (text/json), LOG_SAMPLE_EVERY (100);
+- построчные сообщения прореживаются до записи: цикл идет по
+  sampled(rows), и LogRecord создается только для каждой N-й строки;
+- запись в поток выполняет отдельный поток QueueListener, вызывающий
+  код только кладет запись в очередь.
+
+Пример:
+    from hw3.structured_logging import configure_logging, sampled
+    configure_logging(level='DEBUG', fmt='json')
+    if logger.isEnabledFor(logging.DEBUG):
+        for row in sampled(rows):
+            logger.debug('User row', extra={'row': row})
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterable, Iterator, Optional, TypeVar
+
+# Стандартные атрибуты LogRecord, остальные считаются полями из extra
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+_listener: Optional[QueueListener] = None
+# Каждая какая строка попадает в построчный лог, см. sampled()
+_sample_every = max(int(os.getenv('LOG_SAMPLE_EVERY', 100)), 1)
+
+T = TypeVar('T')
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Текстовый формат: время уровень логгер сообщение key=value ..."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = ' '.join(f'{key}={value}' for key, value in _extra_fields(record).items())
+        return f'{line} {fields}' if fields else line
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'ts': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **_extra_fields(record),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+def sampled(rows: Iterable[T]) -> Iterator[T]:
+    """Каждая N-я строка (начиная с первой) для построчного лога.
+
+    Прореживание до вызова логгера: для пропущенных строк не создается
+    LogRecord и не вызываются фильтры, islice пропускает их на уровне C.
+    """
+    return itertools.islice(rows, 0, None, _sample_every)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      sample_every: Optional[int] = None, use_queue: bool = True,
+                      stream=None) -> Optional[QueueListener]:
+    """Настраивает корневой логгер; повторный вызов заменяет прежнюю настройку"""
+    global _listener, _sample_every
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = fmt or os.getenv('LOG_FORMAT', 'text')
+    if sample_every is None:
+        sample_every = int(os.getenv('LOG_SAMPLE_EVERY', 100))
+    _sample_every = max(sample_every, 1)
+
+    stream_handler = logging.StreamHandler(stream or sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else KeyValueFormatter())
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    if use_queue:
+        handler = QueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = stream_handler
+    root.addHandler(handler)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь и останавливает поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,45 @@
+import pytest
+
+from hw3.sharding import ShardRouter
+
+
+@pytest.fixture
+def shard_urls(tmp_path):
+    """URL трех шардов SQLite во временном каталоге"""
+    return [f"sqlite:///{tmp_path / f's{i}.db'}" for i in range(3)]
+
+
+@pytest.fixture
+def make_router():
+    """Создает ShardRouter с таблицами и закрывает все созданные роутеры"""
+    routers = []
+
+    def make(urls):
+        router = ShardRouter(urls)
+        router.create_all()
+        routers.append(router)
+        return router
+
+    yield make
+
+    for router in routers:
+        router.dispose()
+
+
+@pytest.fixture
+def hw3_db(tmp_path, monkeypatch):
+    """Подменяет engine и сессии hw3.alembic_sqlalchemy на SQLite-файл с таблицами"""
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    from hw3 import alembic_sqlalchemy as db
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'hw3.db'}")
+    event.listen(engine, 'connect', db._enable_sqlite_foreign_keys)
+    db.Base.metadata.create_all(engine)
+    monkeypatch.setattr(db, 'engine', engine)
+    monkeypatch.setattr(db, 'replicas', None)
+    monkeypatch.setattr(db, 'session_local', sessionmaker(
+        autoflush=False, autocommit=False, expire_on_commit=False, bind=engine))
+    yield db
+    engine.dispose()
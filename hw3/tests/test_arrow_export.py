@@ -0,0 +1,91 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+from hw3.arrow_export import (  # noqa: E402
+    MONGO_USERS_SCHEMA, USERS_SCHEMA, iter_mongo_batches, iter_sql_batches, read_parquet, to_pandas,
+    write_parquet,
+)
+
+
+@pytest.fixture
+def users(hw3_db):
+    """Пять пользователей, у последнего возраст не указан"""
+    for i in range(4):
+        hw3_db.create_user(20 + i % 2, f"User{i}", f"user{i}@example.com")
+    hw3_db.create_user(None, "Anon", "anon@example.com")
+    return hw3_db
+
+
+class TestSqlExport:
+    """Выгрузка SQL-таблиц в Arrow и Parquet"""
+
+    def test_batches_follow_primary_key(self, users):
+        # Act
+        batches = list(iter_sql_batches("users", bind=users.engine, batch_size=2))
+
+        # Assert
+        assert [batch.num_rows for batch in batches] == [2, 2, 1]
+        assert all(batch.schema == USERS_SCHEMA for batch in batches)
+        table = pa.Table.from_batches(batches)
+        assert table.column("id").to_pylist() == [1, 2, 3, 4, 5]
+        assert table.column("age").to_pylist() == [20, 21, 20, 21, None]
+
+    def test_partitioned_parquet_round_trip(self, users, tmp_path):
+        # Arrange
+        path = str(tmp_path / "users")
+
+        # Act
+        rows = write_parquet(iter_sql_batches("users", bind=users.engine, batch_size=2),
+                             USERS_SCHEMA, path, partition_by=["age"])
+        table = read_parquet(path, partition_by=["age"]).sort_by("id")
+
+        # Assert
+        assert rows == 5
+        assert sorted(p.name for p in (tmp_path / "users").iterdir()) == \
+            ["age=20", "age=21", "age=__HIVE_DEFAULT_PARTITION__"]
+        assert table.column("name").to_pylist() == ["User0", "User1", "User2", "User3", "Anon"]
+        assert table.column("age").to_pylist() == [20, 21, 20, 21, None]
+
+    def test_empty_table(self, hw3_db, tmp_path):
+        # Act
+        rows = write_parquet(iter_sql_batches("posts", bind=hw3_db.engine), USERS_SCHEMA, str(tmp_path / "posts"))
+
+        # Assert
+        assert rows == 0
+
+    def test_to_pandas_keeps_arrow_types(self, users):
+        # Arrange
+        pytest.importorskip("pandas")
+        table = pa.Table.from_batches(list(iter_sql_batches("users", bind=users.engine)))
+
+        # Act
+        frame = to_pandas(table)
+
+        # Assert
+        assert str(frame["age"].dtype) == "int32[pyarrow]"
+
+
+class TestMongoExport:
+    """Выгрузка Mongo-коллекции users"""
+
+    def test_only_schema_fields_are_exported(self):
+        # Arrange
+        mongomock = pytest.importorskip("mongomock")
+        collection = mongomock.MongoClient().db.users
+        collection.insert_many([
+            {"name": f"User{i}", "age": 20 + i, "city": "Moscow", "status": "active",
+             "profile": {"skill": "python", "level": i}, "password": "secret"}
+            for i in range(3)
+        ])
+
+        # Act
+        batches = list(iter_mongo_batches(collection, {"age": {"$gte": 21}}, batch_size=1))
+
+        # Assert
+        table = pa.Table.from_batches(batches, schema=MONGO_USERS_SCHEMA)
+        assert [batch.num_rows for batch in batches] == [1, 1]
+        assert table.column_names == MONGO_USERS_SCHEMA.names
+        assert table.column("profile").to_pylist() == [{"skill": "python", "level": 1},
+                                                       {"skill": "python", "level": 2}]
+        assert all(isinstance(value, str) for value in table.column("_id").to_pylist())
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select, update
+
+from hw3.backfill import Backfill
+
+
+@pytest.fixture
+def items(tmp_path):
+    """Таблица из 50 строк с пустой колонкой value"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    metadata = MetaData()
+    table = Table("items", metadata, Column("id", Integer, primary_key=True), Column("value", Integer))
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(table), [{"id": i, "value": None} for i in range(1, 51)])
+    yield engine, table
+    engine.dispose()
+
+
+def make_backfill(engine, table, checkpoint_file, lag_fn=None):
+    return Backfill(engine, table, values={"value": 1}, where=table.c.value.is_(None),
+                    batch_size=10, max_sleep=0, lag_fn=lag_fn, checkpoint_file=str(checkpoint_file))
+
+
+class TestBackfill:
+    """Пакетный backfill с контрольной точкой"""
+
+    def test_interrupt_and_resume(self, items, tmp_path):
+        """После прерывания запуск продолжается с контрольной точки и считает все строки"""
+        # Arrange
+        engine, table = items
+        checkpoint = tmp_path / "checkpoint.json"
+        calls = []
+
+        def failing_lag(conn):
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("interrupted")
+            return 0.0
+
+        # Act
+        with pytest.raises(RuntimeError):
+            make_backfill(engine, table, checkpoint, lag_fn=failing_lag).run()
+        saved = json.loads(checkpoint.read_text())
+        total = make_backfill(engine, table, checkpoint).run()
+
+        # Assert
+        assert saved == {"table": "items", "last_pk": 20, "rows": 20}
+        assert total == 50
+        assert not checkpoint.exists()
+        with engine.connect() as conn:
+            assert conn.execute(select(table.c.value).where(table.c.value.is_(None))).all() == []
+
+    def test_checkpoint_of_other_table_is_rejected(self, items, tmp_path):
+        """Контрольная точка другой таблицы не применяется"""
+        # Arrange
+        engine, table = items
+        checkpoint = tmp_path / "checkpoint.json"
+        checkpoint.write_text(json.dumps({"table": "posts", "last_pk": 30, "rows": 30}))
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            make_backfill(engine, table, checkpoint).run()
+
+    def test_connection_batch_rolls_back_on_error(self, items, tmp_path):
+        """С Connection в качестве bind ошибка откатывает незавершенный пакет"""
+        # Arrange
+        engine, table = items
+        with engine.connect() as conn:
+            backfill = make_backfill(conn, table, tmp_path / "checkpoint.json")
+
+            # Act
+            with pytest.raises(RuntimeError):
+                with backfill._transaction() as batch:
+                    batch.execute(update(table).where(table.c.id == 1).values(value=5))
+                    raise RuntimeError("batch failed")
+
+            # Assert
+            assert not conn.in_transaction()
+            assert conn.execute(select(table.c.value).where(table.c.id == 1)).scalar() is None
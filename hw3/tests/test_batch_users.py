@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from hw2.sql_alchemy import UserLoader
+
+
+class TestGetUsers:
+    """Пакетное чтение пользователей hw3.get_users"""
+
+    def test_found_and_missing(self, hw3_db):
+        """Найденные — объекты User, ненайденные — None, дубликаты схлопываются"""
+        # Arrange
+        ids = [hw3_db.create_user(20 + i, f"User{i}", f"user{i}@example.com") for i in range(3)]
+
+        # Act
+        users = hw3_db.get_users([ids[2], 999, ids[0], ids[2]])
+
+        # Assert
+        assert list(users) == [ids[2], 999, ids[0]]
+        assert users[999] is None
+        assert users[ids[0]].name == "User0"
+        assert users[ids[2]].email == "user2@example.com"
+
+    def test_chunks_large_batches(self, hw3_db, monkeypatch):
+        """Список длиннее BATCH_CHUNK_SIZE читается несколькими запросами"""
+        # Arrange
+        monkeypatch.setattr(hw3_db, 'BATCH_CHUNK_SIZE', 2)
+        ids = [hw3_db.create_user(30, f"User{i}", f"user{i}@example.com") for i in range(5)]
+
+        # Act
+        users = hw3_db.get_users(ids)
+
+        # Assert
+        assert [user.id for user in users.values()] == ids
+
+    def test_error_is_raised_not_empty(self, hw3_db):
+        """Ошибка БД не превращается в «все пропали»: UserLoader получает исключение"""
+        # Arrange
+        with hw3_db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE posts")
+            conn.exec_driver_sql("DROP TABLE users")
+        loader = UserLoader(hw3_db.get_users)
+
+        # Act / Assert
+        with pytest.raises(OperationalError):
+            hw3_db.get_users([1])
+        with pytest.raises(OperationalError):
+            loader.get(1)
+
@@ -0,0 +1,25 @@
+class TestBulkCreatePosts:
+    """Массовая вставка постов через INSERT ... RETURNING"""
+
+    def test_ids_follow_input_order(self, hw3_db):
+        # Arrange
+        user_id = hw3_db.create_user(30, "Alice", "alice@example.com")
+        posts = ({"title": f"Post {i}", "content": "text"} for i in range(25))
+
+        # Act
+        post_ids = hw3_db.bulk_create_posts(posts, user_id, batch_size=10)
+
+        # Assert
+        with hw3_db.get_session(read_only=True) as session:
+            titles = {post.id: post.title for post in session.query(hw3_db.Post)}
+        assert [titles[post_id] for post_id in post_ids] == [f"Post {i}" for i in range(25)]
+
+    def test_create_user_with_posts(self, hw3_db):
+        # Arrange
+        posts = [{"title": "First", "content": "a"}, {"title": "Second", "content": "b"}]
+
+        # Act
+        user_id = hw3_db.create_user_with_posts({"name": "Bob", "email": "bob@example.com", "age": 40}, posts)
+
+        # Assert
+        assert [post["title"] for post in hw3_db.get_posts_by_user(user_id)] == ["First", "Second"]
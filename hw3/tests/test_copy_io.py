@@ -0,0 +1,94 @@
+import io
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from hw3.copy_io import RowStream, _copy_sql, export_file, generate_users, import_file, import_rows
+
+
+@pytest.fixture
+def target_engine(hw3_db, tmp_path):
+    """Пустая база с таблицами hw3 для импорта"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'target.db'}")
+    hw3_db.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def all_rows(engine, model):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(select(model.__table__).order_by(model.id))]
+
+
+class TestSqliteFallback:
+    """Импорт и экспорт без COPY: executemany и потоковое чтение"""
+
+    def test_export_import_round_trip(self, hw3_db, target_engine):
+        # Arrange
+        hw3_db.create_user(30, "Alice", "alice@example.com")
+        hw3_db.create_user(None, 'Bob "the, builder"', "bob@example.com")
+        hw3_db.bulk_create_posts([{"title": "Hello", "content": "line1\nline2"}], 1)
+        exported, counts = {}, {}
+
+        # Act
+        for table in ("users", "posts"):
+            buffer = io.BytesIO()
+            counts[table] = export_file(table, buffer, bind=hw3_db.engine)
+            exported[table] = buffer.getvalue()
+            import_file(table, io.BytesIO(exported[table]), bind=target_engine)
+
+        # Assert
+        assert counts == {"users": 2, "posts": 1}
+        assert exported["users"].decode().splitlines()[0] == "id,name,email,age"
+        assert all_rows(target_engine, hw3_db.User) == [
+            (1, "Alice", "alice@example.com", 30),
+            (2, 'Bob "the, builder"', "bob@example.com", None),
+        ]
+        assert all_rows(target_engine, hw3_db.Post) == [(1, "Hello", "line1\nline2", 1)]
+
+    def test_import_rows_from_generator(self, hw3_db):
+        # Act
+        rows = import_rows("users", generate_users(2500), ("name", "email", "age"), bind=hw3_db.engine)
+
+        # Assert
+        users = all_rows(hw3_db.engine, hw3_db.User)
+        assert rows == len(users) == 2500
+        assert users[-1] == (2500, "User2499", "user2499@example.com", 18 + 2499 % 60)
+
+    def test_unknown_columns_are_rejected(self, hw3_db):
+        # Arrange
+        source = io.BytesIO(b"id,name,password\n1,Alice,secret\n")
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="password"):
+            import_file("users", source, bind=hw3_db.engine)
+
+    def test_unknown_table_and_binary_format_are_rejected(self, hw3_db):
+        with pytest.raises(ValueError):
+            export_file("users; DROP TABLE users", io.BytesIO(), bind=hw3_db.engine)
+        with pytest.raises(ValueError):
+            export_file("users", io.BytesIO(), fmt="binary", bind=hw3_db.engine)
+
+
+class TestRowStream:
+    """CSV-поток для COPY FROM STDIN"""
+
+    def test_reads_in_bounded_chunks(self):
+        # Arrange
+        stream = RowStream(((i, f"User{i}") for i in range(1000)), header=("id", "name"))
+
+        # Act
+        chunks = []
+        while chunk := stream.read(100):
+            chunks.append(chunk)
+
+        # Assert
+        assert max(len(chunk) for chunk in chunks) == 100
+        lines = b"".join(chunks).decode().splitlines()
+        assert lines[0] == "id,name"
+        assert lines[-1] == "999,User999"
+        assert stream.rows == 1000
+
+    def test_copy_sql_uses_model_columns(self, hw3_db):
+        assert _copy_sql(hw3_db.User.__table__, "FROM STDIN", "csv") == \
+            "COPY users (id, name, email, age) FROM STDIN WITH (FORMAT csv, HEADER)"
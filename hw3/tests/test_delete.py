@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event, func, select
+
+
+def count(db, model):
+    with db.engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def seed(db, users: int, posts_per_user: int = 2):
+    """Создает пользователей с постами, возраст i-го пользователя — 20 + i"""
+    user_ids = []
+    for i in range(users):
+        user_id = db.create_user(20 + i, f"User{i}", f"user{i}@example.com")
+        db.bulk_create_posts([{"title": f"Post {n}", "content": "text"} for n in range(posts_per_user)], user_id)
+        user_ids.append(user_id)
+    return user_ids
+
+
+class TestDeleteUser:
+    """Удаление пользователей: посты удаляет каскад БД"""
+
+    def test_delete_user_cascades_posts_in_one_statement(self, hw3_db):
+        # Arrange
+        user_id, other_id = seed(hw3_db, 2)
+        statements = []
+        event.listen(hw3_db.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # Act
+        deleted = hw3_db.delete_user(user_id)
+
+        # Assert
+        assert deleted is True
+        assert [s.split()[0] for s in statements] == ["DELETE"]
+        assert hw3_db.get_posts_by_user(user_id) == []
+        assert len(hw3_db.get_posts_by_user(other_id)) == 2
+
+    def test_delete_missing_user(self, hw3_db):
+        assert hw3_db.delete_user(999) is False
+
+    def test_delete_users_in_batches(self, hw3_db):
+        # Arrange
+        user_ids = seed(hw3_db, 7)
+
+        # Act
+        deleted = hw3_db.delete_users(user_ids[:5] + [user_ids[0], 999], batch_size=2)
+
+        # Assert
+        assert deleted == 5
+        assert count(hw3_db, hw3_db.User) == 2
+        assert count(hw3_db, hw3_db.Post) == 4
+
+
+class TestPurgeInactiveUsers:
+    """Удаление по условию пакетами по первичному ключу"""
+
+    def test_purge_by_criteria(self, hw3_db):
+        # Arrange
+        seed(hw3_db, 10)
+
+        # Act
+        purged = hw3_db.purge_inactive_users(hw3_db.User.age >= 25, batch_size=3)
+
+        # Assert
+        assert purged == 5
+        assert [user["age"] for user in hw3_db.get_all_users()] == [20, 21, 22, 23, 24]
+        assert count(hw3_db, hw3_db.Post) == 10
+
+    def test_criteria_required(self, hw3_db):
+        with pytest.raises(ValueError):
+            hw3_db.purge_inactive_users()
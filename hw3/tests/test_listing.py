@@ -0,0 +1,52 @@
+import dataclasses
+
+import pytest
+
+
+@pytest.fixture
+def users_with_posts(hw3_db):
+    """Три пользователя с 0, 1 и 2 постами"""
+    user_ids = []
+    for i in range(3):
+        user_id = hw3_db.create_user(20 + i, f"User{i}", f"user{i}@example.com")
+        hw3_db.bulk_create_posts([{"title": f"Post {i}-{n}", "content": "text"} for n in range(i)], user_id)
+        user_ids.append(user_id)
+    return user_ids
+
+
+class TestListing:
+    """Чтение списков колонками и потоковое чтение строк"""
+
+    def test_get_all_users_counts_posts(self, hw3_db, users_with_posts):
+        # Act
+        users = hw3_db.get_all_users()
+
+        # Assert
+        assert users == [
+            {"id": user_id, "name": f"User{i}", "email": f"user{i}@example.com", "age": 20 + i, "post_count": i}
+            for i, user_id in enumerate(users_with_posts)
+        ]
+
+    def test_iter_users_streams_rows_in_batches(self, hw3_db, users_with_posts):
+        # Act
+        rows = hw3_db.iter_users(batch_size=2)
+        first = next(rows)
+        rest = list(rows)
+
+        # Assert
+        assert first == hw3_db.UserRow(users_with_posts[0], "User0", "user0@example.com", 20)
+        assert [row.id for row in rest] == users_with_posts[1:]
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            first.name = "Changed"
+        assert not hasattr(first, "__dict__")
+
+    def test_iter_posts_by_user_matches_list(self, hw3_db, users_with_posts):
+        # Arrange
+        user_id = users_with_posts[2]
+
+        # Act
+        rows = list(hw3_db.iter_posts_by_user(user_id, batch_size=1))
+
+        # Assert
+        assert [dataclasses.asdict(row) for row in rows] == hw3_db.get_posts_by_user(user_id)
+        assert [row.title for row in rows] == ["Post 2-0", "Post 2-1"]
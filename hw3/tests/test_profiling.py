@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from hw3 import profiling
+from hw3.profiling import auto_profile, flush, profile
+
+
+@pytest.fixture
+def profiling_enabled(tmp_path, monkeypatch):
+    """Включает профилирование с записью во временный каталог и без чужих @auto_profile"""
+    monkeypatch.setattr(profiling, 'ENABLED', profiling.ENABLED)
+    monkeypatch.setattr(profiling, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, '_auto_targets', [])
+    yield
+    flush(str(tmp_path))
+
+
+class TestSampler:
+    """Поток-сэмплер простаивает, пока никто не внутри profile()"""
+
+    def test_has_active_follows_profile_blocks(self, profiling_enabled):
+        """Событие установлено только внутри profile()"""
+        # Arrange
+        profiling.enable()
+
+        # Act
+        with profile('outer'):
+            inside = profiling._profiler.has_active.is_set()
+
+        # Assert
+        assert inside
+        assert not profiling._profiler.has_active.is_set()
+        assert profiling.summary()['outer']['calls'] == 1
+
+
+class TestAutoProfile:
+    """Классы с @auto_profile профилируются при включении"""
+
+    def test_enable_wraps_marked_class(self, profiling_enabled):
+        """enable() оборачивает публичные методы помеченного класса"""
+        # Arrange
+        profiling.disable()
+
+        @auto_profile
+        class Manager:
+            def get_user(self, user_id):
+                return {'id': user_id}
+
+        # Act
+        wrapped_before = getattr(Manager.get_user, '__profiled__', False)
+        profiling.enable()
+        result = Manager().get_user(7)
+
+        # Assert
+        assert not wrapped_before
+        assert result == {'id': 7}
+        assert profiling.summary()['Manager.get_user']['calls'] == 1
+
+    def test_profile_env_wraps_managers_on_import(self):
+        """PROFILE=1: методы DatabaseManager и UserManager обернуты сразу после импорта"""
+        # Arrange
+        code = (
+            'from hw2.sql_alchemy import DatabaseManager\n'
+            'from hw4.main_hw4 import UserManager\n'
+            'print(DatabaseManager.get_user.__profiled__, UserManager.update_status.__profiled__)\n'
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+        # Act
+        result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True,
+                                env={**os.environ, 'PROFILE': '1'}, check=True)
+
+        # Assert
+        assert result.stdout.split() == ['True', 'True']
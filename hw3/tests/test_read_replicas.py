@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+from hw2.sql_alchemy import ReplicaRouter
+
+
+@pytest.fixture
+def replica_db(hw3_db, tmp_path, monkeypatch):
+    """hw3 с репликой в отдельном файле SQLite; в реплике один пользователь «Replica»"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    hw3_db.Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(hw3_db.User).values(id=1, name="Replica", email="replica@example.com", age=50))
+    monkeypatch.setattr(hw3_db, "replicas", ReplicaRouter([engine], sticky_seconds=60))
+    yield hw3_db
+    engine.dispose()
+
+
+def names(db):
+    return [user["name"] for user in db.get_all_users()]
+
+
+def in_other_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+class TestGetSessionRouting:
+    """get_session(read_only=True) читает с реплики, кроме как сразу после записи"""
+
+    def test_read_only_session_uses_replica(self, replica_db):
+        assert names(replica_db) == ["Replica"]
+
+    def test_write_then_read_uses_primary(self, replica_db):
+        # Act
+        replica_db.create_user(30, "Alice", "alice@example.com")
+
+        # Assert
+        assert names(replica_db) == ["Alice"]
+        assert in_other_thread(lambda: names(replica_db)) == ["Replica"]
+
+    def test_failed_write_does_not_pin_primary(self, replica_db):
+        # Act
+        with pytest.raises(RuntimeError):
+            with replica_db.get_session():
+                raise RuntimeError("boom")
+
+        # Assert
+        assert names(replica_db) == ["Replica"]
+
+    def test_writes_use_primary(self, replica_db):
+        # Arrange
+        user_id = in_other_thread(lambda: replica_db.create_user(30, "Alice", "alice@example.com"))
+
+        # Act
+        with replica_db.get_session() as session:
+            user = session.get(replica_db.User, user_id)
+
+        # Assert
+        assert user.name == "Alice"
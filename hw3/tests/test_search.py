@@ -0,0 +1,40 @@
+class TestSearchUsersByName:
+    """Поиск по подстроке имени: FTS5 на SQLite и ограничение результата"""
+
+    def test_fts_orders_closest_names_first(self, hw3_db):
+        # Arrange
+        hw3_db.create_search_index(hw3_db.engine)
+        for name in ["Annabella", "Ivan", "Ann", "Joanna", "Anna"]:
+            hw3_db.create_user(30, name, f"{name.lower()}@example.com")
+
+        # Act
+        users = hw3_db.search_users_by_name("ann")
+
+        # Assert
+        assert [user["name"] for user in users] == ["Ann", "Anna", "Joanna", "Annabella"]
+
+    def test_default_limit_is_bounded(self, hw3_db):
+        # Arrange
+        hw3_db.create_search_index(hw3_db.engine)
+        for i in range(hw3_db.SEARCH_DEFAULT_LIMIT + 10):
+            hw3_db.create_user(30, f"Anna{i}", f"anna{i}@example.com")
+
+        # Act
+        users = hw3_db.search_users_by_name("anna")
+        short = hw3_db.search_users_by_name("an", limit=5)
+
+        # Assert
+        assert len(users) == hw3_db.SEARCH_DEFAULT_LIMIT
+        assert [user["name"] for user in short] == [f"Anna{i}" for i in range(5)]
+
+    def test_special_characters_are_literal(self, hw3_db):
+        """% и _ в подстроке не работают как шаблоны LIKE"""
+        # Arrange
+        hw3_db.create_user(30, "100% Anna", "a@example.com")
+        hw3_db.create_user(30, "100 Anna", "b@example.com")
+
+        # Act
+        users = hw3_db.search_users_by_name("0%")
+
+        # Assert
+        assert [user["name"] for user in users] == ["100% Anna"]
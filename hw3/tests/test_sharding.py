@@ -0,0 +1,42 @@
+from hw3.sharding import ShardedUsers, rebalance
+
+
+class TestRebalance:
+    """Перенос пользователей и постов при добавлении шарда"""
+
+    def test_rebalance_keeps_user_and_post_ids(self, shard_urls, make_router):
+        """2 -> 3 шарда: id пользователей и постов не меняются"""
+        # Arrange
+        source = make_router(shard_urls[:2])
+        users = ShardedUsers(source)
+        expected = {}
+        for i in range(60):
+            user_id = users.create_user(f"User{i}", f"user{i}@example.com", 20 + i % 40)
+            users.create_posts(user_id, [{"title": f"Post {i}-{n}", "content": "text"} for n in range(3)])
+            expected[user_id] = users.get_posts_by_user(user_id)
+
+        # Act
+        target = make_router(shard_urls)
+        moved = rebalance(source, target, batch_size=7)
+
+        # Assert
+        resharded = ShardedUsers(target)
+        assert moved > 0
+        assert [user["id"] for user in resharded.get_all_users()] == sorted(expected)
+        for user_id, posts in expected.items():
+            assert resharded.get_user(user_id)["id"] == user_id
+            assert resharded.get_posts_by_user(user_id) == posts
+
+    def test_post_ids_are_global(self, shard_urls, make_router):
+        """Посты разных шардов не получают одинаковых id"""
+        # Arrange
+        users = ShardedUsers(make_router(shard_urls))
+
+        # Act
+        post_ids = []
+        for i in range(20):
+            user_id = users.create_user(f"User{i}", f"user{i}@example.com", 30)
+            post_ids += users.create_posts(user_id, [{"title": "t", "content": "c"}, {"title": "t", "content": "c"}])
+
+        # Assert
+        assert len(set(post_ids)) == len(post_ids) == 40
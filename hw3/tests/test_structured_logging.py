@@ -0,0 +1,106 @@
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+from logging.handlers import QueueHandler
+
+import pytest
+
+from hw3 import structured_logging
+from hw3.structured_logging import configure_logging, sampled, shutdown_logging
+
+
+@pytest.fixture
+def restore_logging():
+    """Возвращает корневой логгер и прореживание в исходное состояние"""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    sample_every = structured_logging._sample_every
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    structured_logging._sample_every = sample_every
+
+
+class TestSampled:
+    """Прореживание построчного лога"""
+
+    def test_every_nth_row_from_first(self, restore_logging):
+        # Arrange
+        configure_logging(sample_every=3, use_queue=False, stream=io.StringIO())
+
+        # Act
+        rows = list(sampled(range(10)))
+
+        # Assert
+        assert rows == [0, 3, 6, 9]
+
+    @pytest.mark.parametrize("sample_every", [0, -5])
+    def test_non_positive_rate_logs_every_row(self, restore_logging, sample_every):
+        # Arrange
+        configure_logging(sample_every=sample_every, use_queue=False, stream=io.StringIO())
+
+        # Act / Assert
+        assert list(sampled(range(3))) == [0, 1, 2]
+
+    def test_environment_rate_is_clamped_at_import(self):
+        """LOG_SAMPLE_EVERY=0 не ломает sampled() без вызова configure_logging"""
+        # Arrange
+        env = {**os.environ, "LOG_SAMPLE_EVERY": "0"}
+        code = "from hw3.structured_logging import sampled; print(list(sampled(range(3))))"
+
+        # Act
+        result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(structured_logging.__file__)))
+
+        # Assert
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[0, 1, 2]"
+
+
+class TestConfigureLogging:
+    """Форматы и запись через очередь"""
+
+    def test_queue_handler_writes_json_on_shutdown(self, restore_logging):
+        # Arrange
+        stream = io.StringIO()
+        configure_logging(level="DEBUG", fmt="json", stream=stream)
+        logger = logging.getLogger("hw3.tests")
+
+        # Act
+        logger.debug("User row", extra={"row": {"id": 1}})
+        handlers = list(logging.getLogger().handlers)
+        shutdown_logging()
+
+        # Assert
+        assert len(handlers) == 1 and isinstance(handlers[0], QueueHandler)
+        record = json.loads(stream.getvalue())
+        assert record["level"] == "DEBUG"
+        assert record["logger"] == "hw3.tests"
+        assert record["message"] == "User row"
+        assert record["row"] == {"id": 1}
+
+    def test_text_format_appends_extra_fields(self, restore_logging):
+        # Arrange
+        stream = io.StringIO()
+        configure_logging(level="INFO", stream=stream, use_queue=False)
+
+        # Act
+        logging.getLogger("hw3.tests").info("Created user", extra={"user_id": 7})
+        logging.getLogger("hw3.tests").debug("hidden")
+
+        # Assert
+        lines = stream.getvalue().splitlines()
+        assert len(lines) == 1
+        assert lines[0].endswith("INFO hw3.tests Created user user_id=7")
+
+    def test_reconfigure_replaces_handlers(self, restore_logging):
+        # Act
+        configure_logging(stream=io.StringIO())
+        configure_logging(stream=io.StringIO())
+
+        # Assert
+        assert len(logging.getLogger().handlers) == 1
@@ -0,0 +1,167 @@
+"""Асинхронные UserManager и CRUD-функции из test_mongo.py.
+
+Клиент создается явно через create_client (без модульных глобальных
+клиентов), с настройкой пула: maxPoolSize ограничивает число одновременных
+операций к серверу, minPoolSize держит прогретые соединения, а
+maxIdleTimeMS закрывает простаивающие. Используется AsyncMongoClient из
+pymongo >= 4.10, при его отсутствии — motor.
+
+Пример:
+    client = create_client(max_pool_size=50)
+    manager = AsyncUserManager(client["simple_db"].users)
+    by_city = await manager.get_active_by_cities(["Moscow", "SPb", "Kazan"])
+"""
+import asyncio
+import inspect
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+try:
+    from pymongo import AsyncMongoClient
+except ImportError:  # pymongo < 4.10
+    from motor.motor_asyncio import AsyncIOMotorClient as AsyncMongoClient
+
+# Размер пачки для insert_many/bulk_write и курсора
+BATCH_SIZE = 1000
+# Сколько запросов одна операция-веер держит в полете одновременно
+MAX_CONCURRENCY = 10
+
+
+def create_client(uri: str = 'mongodb://localhost:27017/', max_pool_size: int = 100,
+                  min_pool_size: int = 10, max_idle_time_ms: int = 30000, **kwargs):
+    """Асинхронный клиент с настроенным пулом соединений"""
+    return AsyncMongoClient(
+        uri,
+        maxPoolSize=max_pool_size,
+        minPoolSize=min_pool_size,
+        maxIdleTimeMS=max_idle_time_ms,
+        **kwargs,
+    )
+
+
+async def close_client(client) -> None:
+    """close() у AsyncMongoClient — корутина, у motor — обычный метод"""
+    result = client.close()
+    if inspect.isawaitable(result):
+        await result
+
+
+def _chunks(items: Iterable, size: int) -> Iterable[list]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+async def _gather_limited(coroutines: Iterable, limit: int) -> list:
+    """asyncio.gather, но не больше limit корутин одновременно"""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(*(run(coroutine) for coroutine in coroutines))
+
+
+class AsyncUserManager:
+    """Асинхронный аналог UserManager из main_hw4"""
+
+    def __init__(self, collection):
+        self.col = collection
+
+    async def get_active_by_city(self, city) -> List[dict]:
+        return await self.col.find({"city": city, "status": "active"}).to_list(None)
+
+    async def get_active_by_cities(self, cities: Iterable[str],
+                                   concurrency: int = MAX_CONCURRENCY) -> Dict[str, List[dict]]:
+        """Активные пользователи по нескольким городам параллельными запросами"""
+        cities = list(cities)
+        results = await _gather_limited((self.get_active_by_city(city) for city in cities), concurrency)
+        return dict(zip(cities, results))
+
+    async def update_status(self, name, status):
+        await self.col.update_one({"name": name}, {"$set": {"status": status}})
+
+    async def update_statuses(self, updates: Iterable[Tuple[str, str]],
+                              batch_size: int = BATCH_SIZE) -> int:
+        """Пакетное обновление статусов: одна bulk_write на batch_size пар (name, status)"""
+        return await update_users(
+            self.col,
+            (({"name": name}, {"$set": {"status": status}}) for name, status in updates),
+            batch_size,
+        )
+
+
+# ==================== CRUD из test_mongo.py ====================
+
+async def create_users(collection, users: Iterable[dict], batch_size: int = BATCH_SIZE,
+                       concurrency: int = MAX_CONCURRENCY) -> list:
+    """Вставляет пользователей пачками, пачки уходят на сервер параллельно"""
+    results = await _gather_limited(
+        (collection.insert_many(chunk, ordered=False) for chunk in _chunks(users, batch_size)),
+        concurrency,
+    )
+    return [inserted_id for result in results for inserted_id in result.inserted_ids]
+
+
+async def read_users(collection, query: Optional[dict] = None,
+                     batch_size: int = BATCH_SIZE) -> AsyncIterator[dict]:
+    """Потоковое чтение пользователей без загрузки всей выборки в память"""
+    async for user in collection.find(query or {}).batch_size(batch_size):
+        yield user
+
+
+async def update_users(collection, updates: Iterable[Tuple[dict, dict]],
+                       batch_size: int = BATCH_SIZE, concurrency: int = MAX_CONCURRENCY) -> int:
+    """Пары (фильтр, изменение) через bulk_write; возвращает число измененных документов"""
+    results = await _gather_limited(
+        (collection.bulk_write([UpdateOne(query, change) for query, change in chunk], ordered=False)
+         for chunk in _chunks(updates, batch_size)),
+        concurrency,
+    )
+    return sum(result.modified_count for result in results)
+
+
+async def delete_users(collection, names: Iterable[str], batch_size: int = BATCH_SIZE) -> int:
+    """Удаляет пользователей по именам, по одному delete_many на пачку"""
+    deleted = 0
+    for chunk in _chunks(names, batch_size):
+        result = await collection.delete_many({"name": {"$in": chunk}})
+        deleted += result.deleted_count
+    return deleted
+
+
+async def main():
+    client = create_client()
+    collection = client["test_database"]["users"]
+    try:
+        await collection.delete_many({})
+        ids = await create_users(collection, (
+            {"name": f"User{i}", "age": 20 + i % 30, "city": ["Москва", "Сочи", "Брянск"][i % 3],
+             "status": "active"}
+            for i in range(10000)
+        ))
+        print(f"Создано пользователей: {len(ids)}")
+
+        manager = AsyncUserManager(collection)
+        by_city = await manager.get_active_by_cities(["Москва", "Сочи", "Брянск"])
+        print({city: len(users) for city, users in by_city.items()})
+
+        updated = await manager.update_statuses((f"User{i}", "inactive") for i in range(0, 10000, 2))
+        print(f"Обновлено пользователей: {updated}")
+
+        deleted = await delete_users(collection, (f"User{i}" for i in range(0, 10000, 3)))
+        print(f"Удалено пользователей: {deleted}")
+
+        count = 0
+        async for _ in read_users(collection, {"status": "active"}):
+            count += 1
+        print(f"Активных осталось: {count}")
+    finally:
+        await close_client(client)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Бенчмарк моделей хранения событий: бакеты, time-series и документ на событие.
+
+Нужен настоящий сервер MongoDB (mongomock не поддерживает time-series
+коллекции и bulk_write актуального pymongo). Для каждой модели измеряет
+скорость записи, число документов, размер данных и индексов и задержку
+чтения часового интервала одного пользователя.
+
+Запуск из корня репозитория:
+    python -m hw4.bench_events --mongo-uri mongodb://localhost:27017 --events 1000000 --users 1000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from hw4.events import MODELS, EventStore
+from hw4.main_hw4 import create_client
+
+EVENT_TYPES = ["login", "view", "click", "purchase"]
+
+
+def load(store: EventStore, events: int, users: int, start: datetime) -> float:
+    """Пишет события равномерно по суткам, возвращает события в секунду"""
+    step = timedelta(days=1) / events
+    started = time.perf_counter()
+    with store:
+        for i in range(events):
+            store.append(random.randrange(users), random.choice(EVENT_TYPES), {"n": i}, ts=start + step * i)
+    return events / (time.perf_counter() - started)
+
+
+def read_latency(store: EventStore, users: int, start: datetime, queries: int) -> float:
+    """Медиана чтения часового интервала, мс"""
+    latencies = []
+    for _ in range(queries):
+        begin = start + timedelta(hours=random.randrange(23), minutes=random.randrange(60))
+        started = time.perf_counter()
+        store.events_between(random.randrange(users), begin, begin + timedelta(hours=1))
+        latencies.append((time.perf_counter() - started) * 1000)
+    return statistics.median(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    client = create_client(args.mongo_uri)
+    db = client['bench_events']
+    start = datetime(2026, 1, 1)
+    print(f'{args.events} events, {args.users} users')
+    for model in MODELS:
+        db.drop_collection(f'events_{model}')
+        store = EventStore(db, model=model, name=f'events_{model}')
+        store.create_indexes()
+        rate = load(store, args.events, args.users, start)
+        stats = db.command('collStats', store.name)
+        latency = read_latency(store, args.users, start, args.queries)
+        print(f'{model:>10}: {rate:10,.0f} events/sec, {stats.get("count", store.document_count()):9} docs, '
+              f'data {stats["size"] / 2 ** 20:8.1f} MB, indexes {stats["totalIndexSize"] / 2 ** 20:7.1f} MB, '
+              f'1h read p50 {latency:6.2f} ms')
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
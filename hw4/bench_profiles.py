@@ -0,0 +1,77 @@
+"""Бенчмарк профилей производительности UserManager и сжатия трафика.
+
+Для каждого алгоритма сжатия и профиля измеряет массовую вставку,
+обновления статуса и агрегацию по городам. Различия профилей видны
+только на replica set (w=majority ждет вторичные узлы, secondaryPreferred
+читает с них); без --mongo-uri используется mongomock, где профили
+игнорируются, и цифры годятся лишь для проверки самого скрипта.
+Алгоритмы сжатия без клиентского модуля (zstandard, python-snappy)
+пропускаются, а не измеряются под чужим именем.
+
+Запуск из корня репозитория:
+    python -m hw4.bench_profiles --mongo-uri "mongodb://localhost:27017/?replicaSet=rs0" --rows 100000
+"""
+import argparse
+import time
+
+from hw4.main_hw4 import UserManager, available_compressors, create_client, generate_users
+
+OPERATIONS = {
+    'insert_many': ['default', 'bulk_load', 'unacknowledged', 'critical'],
+    'update_status': ['default', 'critical'],
+    'city_stats': ['default', 'analytics', 'fast_read', 'critical'],
+}
+
+
+def run(manager: UserManager, operation: str, profile: str, rows: int, updates: int) -> float:
+    """Время операции в секундах"""
+    started = time.perf_counter()
+    if operation == 'insert_many':
+        users = generate_users(rows)
+        for start in range(0, rows, 1000):
+            manager.insert_many(users[start:start + 1000], profile=profile)
+    elif operation == 'update_status':
+        for i in range(updates):
+            manager.update_status(f'User{i}', 'active' if i % 2 else 'inactive', profile=profile)
+    else:
+        manager.city_stats(profile=profile)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mongo-uri', help='MongoDB server; mongomock if omitted')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--compressors', default='none,zlib,snappy,zstd',
+                        help='comma separated list, "none" disables compression')
+    args = parser.parse_args()
+
+    compressors = args.compressors.split(',') if args.mongo_uri else ['none']
+    for compressor in compressors:
+        if compressor != 'none' and not available_compressors(compressor):
+            # Без модуля pymongo молча работал бы без сжатия, цифры были бы не о нем
+            print(f'\ncompressor: {compressor} skipped, client module is not installed')
+            continue
+        if args.mongo_uri:
+            client = create_client(args.mongo_uri, compressors=None if compressor == 'none' else compressor)
+        else:
+            import mongomock
+            client = mongomock.MongoClient()
+        collection = client['bench_db'].users
+        manager = UserManager(collection)
+
+        # Сервер может не поддерживать алгоритм; тогда сжатия в этом прогоне нет
+        print(f'\ncompressor: {compressor}')
+        for operation, profiles in OPERATIONS.items():
+            for profile in profiles:
+                if operation == 'insert_many':
+                    collection.drop()
+                elapsed = run(manager, operation, profile, args.rows, args.updates)
+                count = {'insert_many': args.rows, 'update_status': args.updates}.get(operation, 1)
+                print(f'{operation:>14} {profile:>15}: {elapsed:8.3f} s ({count / elapsed:10,.0f} ops/sec)')
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
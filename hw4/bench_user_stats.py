@@ -0,0 +1,110 @@
+"""Бенчмарк UserStats против агрегаций $group из main_hw4.
+
+Без --mongo-uri используется mongomock: агрегации в нем выполняются в
+Python и заметно медленнее настоящего сервера, поэтому цифры для решения
+стоит снимать на MongoDB.
+
+Запуск из корня репозитория:
+    python -m hw4.bench_user_stats --rows 1000000 --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import math
+import random
+import time
+
+from hw4.main_hw4 import ACTIVE_BY_CITY_PIPELINE, city_stats_pipeline, generate_users
+from hw4.user_stats import UserStats
+
+AGE_30_40 = {"age": {"$gte": 30, "$lte": 40}}
+# Доля пользователей без возраста: $avg их пропускает, UserStats тоже должен
+MISSING_AGE_SHARE = 0.05
+
+PIPELINES = {
+    'by city': city_stats_pipeline(),
+    'active by city': ACTIVE_BY_CITY_PIPELINE,
+    'age 30-40 by city': city_stats_pipeline(AGE_30_40),
+}
+
+
+def seed(collection, rows: int) -> None:
+    collection.drop()
+    for start in range(0, rows, 10000):
+        users = generate_users(min(10000, rows - start))
+        for user in users:
+            if random.random() < MISSING_AGE_SHARE:
+                user["age"] = None
+        collection.insert_many(users)
+
+
+def from_aggregation(result) -> dict:
+    """Результат $group в формате UserStats.group_by_city"""
+    return {
+        doc["_id"]: {"count": doc.get("count", doc.get("active_users")), "avg_age": doc.get("avg_age")}
+        for doc in result
+    }
+
+
+def same_groups(mongo: dict, local: dict) -> bool:
+    if mongo.keys() != local.keys():
+        return False
+    for city, expected in mongo.items():
+        actual = local[city]
+        if expected["count"] != actual["count"]:
+            return False
+        if expected["avg_age"] is not None and not math.isclose(expected["avg_age"], actual["avg_age"]):
+            return False
+    return True
+
+
+def timed(fn, repeat: int) -> float:
+    """Среднее время одного вызова в миллисекундах"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--mongo-uri', help='MongoDB server; mongomock if omitted')
+    args = parser.parse_args()
+
+    if args.mongo_uri:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+    else:
+        import mongomock
+        client = mongomock.MongoClient()
+    collection = client["bench_db"].users
+    seed(collection, args.rows)
+
+    started = time.perf_counter()
+    stats = UserStats.from_mongo(collection)
+    print(f"{'mongomock' if not args.mongo_uri else 'mongodb'}, {args.rows} users, "
+          f"loaded in {time.perf_counter() - started:.2f}s")
+
+    local = {
+        'by city': lambda: stats.group_by_city(),
+        'active by city': lambda: stats.group_by_city(stats.filter(status="active")),
+        'age 30-40 by city': lambda: stats.group_by_city(stats.filter(min_age=30, max_age=40)),
+    }
+    for name, pipeline in PIPELINES.items():
+        mongo = from_aggregation(collection.aggregate(pipeline))
+        local_result = local[name]()
+        if not same_groups(mongo, local_result):
+            raise SystemExit(f"{name}: results differ\n$group: {mongo}\nnumpy:  {local_result}")
+
+        mongo_ms = timed(lambda: list(collection.aggregate(pipeline)), args.repeat)
+        numpy_ms = timed(local[name], args.repeat)
+        print(f"{name:>18}: $group {mongo_ms:9.2f} ms, numpy {numpy_ms:7.2f} ms ({mongo_ms / numpy_ms:.0f}x)")
+
+    ids = [doc["_id"] for doc in collection.find({}, {"_id": 1}).limit(1000)]
+    update_ms = timed(lambda: [stats.upsert(key, {"status": "active", "age": 33}) for key in ids], 1)
+    print(f"{'1000 upserts':>18}: {update_ms:.2f} ms")
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
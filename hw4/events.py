@@ -0,0 +1,172 @@
+"""События активности пользователей в MongoDB: бакеты, time-series и TTL.
+
+Три модели хранения (параметр model у EventStore):
+- "bucket": один документ на пользователя и час, события в массиве events
+  (до BUCKET_SIZE штук); миллионы событий в день дают в сотни раз меньше
+  документов и индексных записей;
+- "timeseries": нативная time-series коллекция MongoDB 5+, сервер сам
+  группирует события в бакеты;
+- "flat": документ на событие, базовый вариант для сравнения.
+
+Старые данные удаляет TTL-индекс: у бакета поле expires_at сдвигается
+вперед с каждым новым событием, у flat истекает каждое событие, у
+time-series задается expireAfterSeconds при создании коллекции.
+
+Пример:
+    store = EventStore(client["simple_db"], model="bucket")
+    store.create_indexes()
+    with store:
+        store.append(user_id, "login", {"ip": "10.0.0.1"})
+    store.events_between(user_id, start, end)
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import CollectionInvalid
+
+# Максимум событий в одном бакете
+BUCKET_SIZE = 200
+# Длина интервала бакета
+BUCKET_SPAN = timedelta(hours=1)
+# Сколько хранить события
+RETENTION = timedelta(days=30)
+# Сколько событий копить в памяти до автоматической записи
+FLUSH_EVENTS = 1000
+
+MODELS = ("bucket", "timeseries", "flat")
+
+
+def to_utc(ts: datetime) -> datetime:
+    """Наивное время в UTC: так pymongo возвращает даты без tz_aware=True"""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts: datetime) -> datetime:
+    """Начало интервала бакета, в который попадает момент ts"""
+    ts = to_utc(ts)
+    return ts - (ts - datetime(1970, 1, 1)) % BUCKET_SPAN
+
+
+class EventStore:
+    """Запись и чтение событий пользователей с пакетированием в памяти"""
+
+    def __init__(self, db, model: str = "bucket", name: str = "events",
+                 retention: timedelta = RETENTION, flush_events: int = FLUSH_EVENTS):
+        if model not in MODELS:
+            raise ValueError(f"Неизвестная модель: {model}")
+        self.db = db
+        self.model = model
+        self.name = name
+        self.col = db[name]
+        self.retention = retention
+        self.flush_events = flush_events
+        self._buffer: List[dict] = []
+
+    def create_indexes(self) -> None:
+        """Создает коллекцию и индексы выбранной модели"""
+        if self.model == "timeseries":
+            try:
+                self.db.create_collection(
+                    self.name,
+                    timeseries={"timeField": "ts", "metaField": "user_id", "granularity": "seconds"},
+                    expireAfterSeconds=int(self.retention.total_seconds()),
+                )
+            except CollectionInvalid:
+                pass  # коллекция уже есть
+        elif self.model == "bucket":
+            self.col.create_index([("user_id", ASCENDING), ("start", ASCENDING)])
+            self.col.create_index("expires_at", expireAfterSeconds=0)
+        else:
+            self.col.create_index([("user_id", ASCENDING), ("ts", ASCENDING)])
+            self.col.create_index("ts", expireAfterSeconds=int(self.retention.total_seconds()))
+
+    # ---------- запись ----------
+
+    def append(self, user_id: Any, event_type: str, data: Optional[dict] = None,
+               ts: Optional[datetime] = None) -> None:
+        """Добавляет событие в буфер; запись в БД пачкой при переполнении или flush"""
+        self._buffer.append({
+            "user_id": user_id,
+            "ts": to_utc(ts or datetime.now(timezone.utc)),
+            "type": event_type,
+            "data": data or {},
+        })
+        if len(self._buffer) >= self.flush_events:
+            self.flush()
+
+    def flush(self) -> int:
+        """Записывает накопленные события и возвращает их число"""
+        events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+        if self.model == "bucket":
+            self._flush_buckets(events)
+        else:
+            self.col.insert_many(events, ordered=False)
+        return len(events)
+
+    def _flush_buckets(self, events: List[dict]) -> None:
+        """Одна bulk_write: по upsert на каждую часть бакета.
+
+        Фильтр count <= BUCKET_SIZE - k пропускает заполненный бакет, и upsert
+        создает следующий документ для того же (user_id, start).
+        """
+        groups: Dict[tuple, List[dict]] = defaultdict(list)
+        for event in events:
+            groups[(event["user_id"], bucket_start(event["ts"]))].append(event)
+
+        requests = []
+        for (user_id, start), group in groups.items():
+            group.sort(key=lambda event: event["ts"])
+            for offset in range(0, len(group), BUCKET_SIZE):
+                chunk = [{"ts": e["ts"], "type": e["type"], "data": e["data"]}
+                         for e in group[offset:offset + BUCKET_SIZE]]
+                requests.append(UpdateOne(
+                    {"user_id": user_id, "start": start, "count": {"$lte": BUCKET_SIZE - len(chunk)}},
+                    {
+                        "$push": {"events": {"$each": chunk}},
+                        "$inc": {"count": len(chunk)},
+                        "$min": {"first_ts": chunk[0]["ts"]},
+                        "$max": {"last_ts": chunk[-1]["ts"], "expires_at": chunk[-1]["ts"] + self.retention},
+                    },
+                    upsert=True,
+                ))
+        # ordered=True: части одного бакета должны применяться по очереди
+        self.col.bulk_write(requests, ordered=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    # ---------- чтение ----------
+
+    def events_between(self, user_id: Any, start: datetime, end: datetime) -> List[dict]:
+        """События пользователя в интервале [start, end) по возрастанию времени"""
+        start, end = to_utc(start), to_utc(end)
+        if self.model != "bucket":
+            query = {"user_id": user_id, "ts": {"$gte": start, "$lt": end}}
+            return list(self.col.find(query, {"_id": 0, "user_id": 0}).sort("ts", ASCENDING))
+
+        # Бакет с началом до start может содержать события после start
+        query = {"user_id": user_id, "start": {"$gte": bucket_start(start), "$lt": end}}
+        events = []
+        for bucket in self.col.find(query, {"events": 1}):
+            events.extend(e for e in bucket["events"] if start <= e["ts"] < end)
+        events.sort(key=lambda event: event["ts"])
+        return events
+
+    def count_by_type(self, user_id: Any, start: datetime, end: datetime) -> Dict[str, int]:
+        """Число событий каждого типа в интервале"""
+        counts: Dict[str, int] = defaultdict(int)
+        for event in self.events_between(user_id, start, end):
+            counts[event["type"]] += 1
+        return dict(counts)
+
+    def document_count(self) -> int:
+        return self.col.estimated_document_count()
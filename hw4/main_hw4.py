@@ -1,68 +1,161 @@
-from pymongo import MongoClient, ASCENDING
+from pymongo import MongoClient, ASCENDING, ReadPreference, WriteConcern
+from pymongo.read_concern import ReadConcern
+import importlib.util
 import random
 
-# Подключаемся надо только вначале докер поднять.
-client = MongoClient()
-db = client["simple_db"]
-users = db.users
-
-# Тут удаляем индексы и оздаем по новой
-users.drop()
-users.create_index("city")
-users.create_index([("status", ASCENDING), ("age", ASCENDING)])
-
-
-data = [
-    {
-        "name": f"User{i}",
-        "age": random.randint(20, 50),
-        "city": random.choice(["Moscow", "SPb", "Kazan"]),
-        "status": random.choice(["active", "inactive"]),
-        "profile": {
-            "skill": random.choice(["Python", "Java", "JS"]),
-            "level": random.randint(1, 5)
-        }
-    }
-    for i in range(30)
-]
-users.insert_many(data)
-print("Данные добавлены")
-
-
-class UserManager:
-    def __init__(self, collection):
-        self.col = collection
-
-    def get_active_by_city(self, city):
-        return list(self.col.find({"city": city, "status": "active"}))
+from hw3.profiling import auto_profile
 
-    def update_status(self, name, status):
-        self.col.update_one({"name": name}, {"$set": {"status": status}})
+# Профили производительности: опции коллекции для класса операций
+# - bulk_load: подтверждение только от primary без журнала, для массовой загрузки
+# - analytics: агрегации читают со вторичных узлов, разгружая primary
+# - critical: запись подтверждена большинством и не откатится при смене primary
+# - fast_read: чтение с ближайшего узла (может быть немного устаревшим)
+PROFILES = {
+    "default": {},
+    "bulk_load": {"write_concern": WriteConcern(w=1, j=False)},
+    "unacknowledged": {"write_concern": WriteConcern(w=0)},
+    "analytics": {"read_preference": ReadPreference.SECONDARY_PREFERRED},
+    "critical": {
+        "write_concern": WriteConcern(w="majority", wtimeout=5000),
+        "read_concern": ReadConcern("majority"),
+    },
+    "fast_read": {"read_preference": ReadPreference.NEAREST},
+}
 
+# Профиль по умолчанию для каждого метода UserManager. update_status пишет
+# с настройками коллекции; w=majority включается явно: profile="critical"
+OPERATION_PROFILES = {
+    "get_active_by_city": "default",
+    "update_status": "default",
+    "insert_many": "bulk_load",
+    "city_stats": "analytics",
+}
 
-print("\nАгрегация 1: Статистика по городам")
-result1 = users.aggregate([
+# Агрегации по городам: общие для UserManager, main и hw4/bench_user_stats
+CITY_STATS_PIPELINE = [
     {"$group": {
         "_id": "$city",
         "count": {"$sum": 1},
         "avg_age": {"$avg": "$age"}
     }}
-])
-for r in result1:
-    print(f"{r['_id']}: {r['count']} users, avg age {r['avg_age']:.1f}")
-
-print("\nАгрегация 2: Активные пользователи по городу (использует индекс)")
-result2 = users.aggregate([
+]
+ACTIVE_BY_CITY_PIPELINE = [
     {"$match": {"status": "active"}},  # Использует индекс
     {"$group": {
         "_id": "$city",
         "active_users": {"$sum": 1}
     }}
-])
-for r in result2:
-    print(f"{r['_id']}: {r['active_users']} active users")
+]
+
+
+def city_stats_pipeline(match=None):
+    """CITY_STATS_PIPELINE с предварительным $match"""
+    return ([{"$match": match}] if match else []) + CITY_STATS_PIPELINE
+
+
+# Сжатие трафика в порядке предпочтения
+COMPRESSORS = "zstd,snappy,zlib"
+# Модуль, без которого pymongo пропускает алгоритм (с предупреждением)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+
+def available_compressors(compressors=COMPRESSORS):
+    """Алгоритмы из списка через запятую, для которых установлен модуль"""
+    return [
+        name for name in compressors.split(",")
+        if name in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[name])
+    ]
+
+
+def create_client(uri="mongodb://localhost:27017/", compressors=COMPRESSORS, **kwargs):
+    """Клиент со сжатием трафика; compressors=None отключает сжатие.
+
+    Передаются только доступные алгоритмы; если ни одного нет, клиент без сжатия.
+    """
+    available = available_compressors(compressors) if compressors else []
+    if available:
+        kwargs["compressors"] = ",".join(available)
+    return MongoClient(uri, **kwargs)
+
+
+def with_profile(collection, profile):
+    """Та же коллекция с опциями профиля (объект легкий, соединения общие)"""
+    if profile not in PROFILES:
+        raise ValueError(f"Неизвестный профиль: {profile}")
+    options = PROFILES[profile]
+    return collection.with_options(**options) if options else collection
+
+
+@auto_profile
+class UserManager:
+    def __init__(self, collection):
+        self.col = collection
+        self._profiled = {}
+
+    def _col(self, method, profile):
+        profile = profile or OPERATION_PROFILES[method]
+        if profile not in self._profiled:
+            self._profiled[profile] = with_profile(self.col, profile)
+        return self._profiled[profile]
+
+    def get_active_by_city(self, city, profile=None):
+        return list(self._col("get_active_by_city", profile).find({"city": city, "status": "active"}))
+
+    def update_status(self, name, status, profile=None):
+        self._col("update_status", profile).update_one({"name": name}, {"$set": {"status": status}})
+
+    def insert_many(self, users, profile=None):
+        """Массовая вставка; ordered=False не останавливается на первой ошибке"""
+        return self._col("insert_many", profile).insert_many(users, ordered=False)
+
+    def city_stats(self, profile=None, match=None):
+        return list(self._col("city_stats", profile).aggregate(city_stats_pipeline(match)))
+
+
+def generate_users(count):
+    return [
+        {
+            "name": f"User{i}",
+            "age": random.randint(20, 50),
+            "city": random.choice(["Moscow", "SPb", "Kazan"]),
+            "status": random.choice(["active", "inactive"]),
+            "profile": {
+                "skill": random.choice(["Python", "Java", "JS"]),
+                "level": random.randint(1, 5)
+            }
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    # Подключаемся надо только вначале докер поднять.
+    client = create_client()
+    db = client["simple_db"]
+    users = db.users
+
+    # Тут удаляем индексы и оздаем по новой
+    users.drop()
+    users.create_index("city")
+    users.create_index([("status", ASCENDING), ("age", ASCENDING)])
 
-if __name__ == "__main__":
     manager = UserManager(users)
+    manager.insert_many(generate_users(30))
+    print("Данные добавлены")
+
+    print("\nАгрегация 1: Статистика по городам")
+    for r in manager.city_stats():
+        print(f"{r['_id']}: {r['count']} users, avg age {r['avg_age']:.1f}")
+
+    print("\nАгрегация 2: Активные пользователи по городу (использует индекс)")
+    result2 = with_profile(users, "analytics").aggregate(ACTIVE_BY_CITY_PIPELINE)
+    for r in result2:
+        print(f"{r['_id']}: {r['active_users']} active users")
+
     moscow_active = manager.get_active_by_city("Moscow")
     print(f"\nАктивных в Москве: {len(moscow_active)}")
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from hw4.events import BUCKET_SIZE, EventStore, bucket_start
+
+mongomock = pytest.importorskip("mongomock")
+
+# mongomock выполняет TTL-индексы, поэтому события берутся недавние
+HOUR = bucket_start(datetime.now(timezone.utc)) - timedelta(hours=3)
+
+
+class BulkWriteAsUpdates:
+    """mongomock.bulk_write несовместим с UpdateOne pymongo 4.x: запросы применяются по одному"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def bulk_write(self, requests, ordered=True):
+        for request in requests:
+            self._collection.update_one(request._filter, request._doc, upsert=request._upsert)
+
+
+@pytest.fixture
+def make_store():
+    # Клиент mongomock хранит данные, пока жив сам объект клиента
+    client = mongomock.MongoClient()
+
+    def make(model="bucket", **kwargs):
+        store = EventStore(client.db, model=model, **kwargs)
+        store.col = BulkWriteAsUpdates(store.col)
+        store.create_indexes()
+        return store
+
+    return make
+
+
+class TestBucketModel:
+    """Один документ на пользователя и час, не больше BUCKET_SIZE событий"""
+
+    def test_full_buckets_spill_into_new_documents(self, make_store):
+        # Arrange
+        store = make_store()
+        total = 2 * BUCKET_SIZE + 50
+
+        # Act
+        with store:
+            for i in range(total):
+                store.append(1, "click", {"n": i}, ts=HOUR + timedelta(seconds=i))
+        with store:
+            for i in range(10):
+                store.append(1, "click", {"n": total + i}, ts=HOUR + timedelta(seconds=total + i))
+
+        # Assert
+        assert sorted(bucket["count"] for bucket in store.col.find()) == [60, BUCKET_SIZE, BUCKET_SIZE]
+        events = store.events_between(1, HOUR, HOUR + timedelta(hours=1))
+        assert [event["data"]["n"] for event in events] == list(range(total + 10))
+
+    def test_events_between_filters_inside_buckets(self, make_store):
+        # Arrange
+        store = make_store()
+        with store:
+            for minutes in (10, 50, 70, 130):
+                store.append(1, "login", ts=HOUR + timedelta(minutes=minutes))
+            store.append(2, "login", ts=HOUR + timedelta(minutes=55))
+
+        # Act
+        events = store.events_between(1, HOUR + timedelta(minutes=30), HOUR + timedelta(minutes=130))
+
+        # Assert
+        assert [event["ts"] for event in events] == [HOUR + timedelta(minutes=50), HOUR + timedelta(minutes=70)]
+        assert store.document_count() == 4   # три часа пользователя 1 и один час пользователя 2
+
+    def test_bucket_ttl_follows_last_event(self, make_store):
+        # Arrange
+        store = make_store(retention=timedelta(days=1))
+
+        # Act
+        with store:
+            store.append(1, "login", ts=HOUR + timedelta(minutes=5))
+            store.append(1, "logout", ts=HOUR + timedelta(minutes=40))
+
+        # Assert
+        bucket = store.col.find_one()
+        assert bucket["start"] == HOUR
+        assert bucket["expires_at"] == HOUR + timedelta(minutes=40, days=1)
+        assert store.col.index_information()["expires_at_1"]["expireAfterSeconds"] == 0
+
+
+class TestFlatModel:
+    """Документ на событие"""
+
+    def test_count_by_type_and_ttl_index(self, make_store):
+        # Arrange
+        store = make_store("flat", retention=timedelta(days=2))
+
+        # Act
+        with store:
+            for i, event_type in enumerate(["login", "click", "click", "logout"]):
+                store.append(1, event_type, ts=HOUR + timedelta(minutes=i))
+
+        # Assert
+        assert store.count_by_type(1, HOUR, HOUR + timedelta(hours=1)) == {"login": 1, "click": 2, "logout": 1}
+        assert store.col.index_information()["ts_1"]["expireAfterSeconds"] == 2 * 24 * 3600
+
+
+class TestBuffering:
+    def test_flushes_when_buffer_is_full(self, make_store):
+        # Arrange
+        store = make_store("flat", flush_events=3)
+
+        # Act
+        for i in range(4):
+            store.append(1, "click", ts=HOUR + timedelta(seconds=i))
+
+        # Assert
+        assert store.document_count() == 3
+        assert store.flush() == 1
+        assert store.flush() == 0
+
+    def test_aware_timestamps_are_stored_in_utc(self, make_store):
+        # Arrange
+        store = make_store("flat")
+        moscow = timezone(timedelta(hours=3))
+        local_hour = HOUR.replace(tzinfo=timezone.utc).astimezone(moscow)
+
+        # Act
+        with store:
+            store.append(1, "login", ts=local_hour)
+
+        # Assert
+        assert store.events_between(1, HOUR, HOUR + timedelta(minutes=1))[0]["ts"] == HOUR
+        assert bucket_start(local_hour + timedelta(minutes=59)) == HOUR
+
+    def test_unknown_model(self):
+        with pytest.raises(ValueError):
+            EventStore(mongomock.MongoClient().db, model="columnar")
+
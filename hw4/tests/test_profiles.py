@@ -0,0 +1,64 @@
+import pytest
+from pymongo import MongoClient, ReadPreference
+
+from hw4 import main_hw4
+from hw4.main_hw4 import OPERATION_PROFILES, PROFILES, UserManager, available_compressors, with_profile
+
+
+@pytest.fixture
+def collection():
+    """Коллекция pymongo без подключения: опции профилей проверяются без сервера"""
+    client = MongoClient("mongodb://localhost:27017/", connect=False)
+    yield client.simple_db.users
+    client.close()
+
+
+class TestProfiles:
+    """Профили производительности UserManager"""
+
+    def test_every_operation_has_known_profile(self):
+        assert set(OPERATION_PROFILES.values()) <= set(PROFILES)
+
+    def test_update_status_keeps_collection_write_concern_by_default(self, collection):
+        # Arrange
+        manager = UserManager(collection)
+
+        # Act
+        default = manager._col("update_status", None)
+        critical = manager._col("update_status", "critical")
+
+        # Assert
+        assert default.write_concern == collection.write_concern
+        assert critical.write_concern.document == {"w": "majority", "wtimeout": 5000}
+        assert critical.read_concern.level == "majority"
+
+    def test_operation_defaults(self, collection):
+        # Arrange
+        manager = UserManager(collection)
+
+        # Act / Assert
+        assert manager._col("city_stats", None).read_preference == ReadPreference.SECONDARY_PREFERRED
+        assert manager._col("insert_many", None).write_concern.document == {"w": 1, "j": False}
+        assert manager._col("get_active_by_city", None) is collection
+
+    def test_profiled_collections_are_reused(self, collection):
+        # Arrange
+        manager = UserManager(collection)
+
+        # Act / Assert
+        assert manager._col("city_stats", "analytics") is manager._col("city_stats", None)
+
+    def test_unknown_profile(self, collection):
+        with pytest.raises(ValueError):
+            with_profile(collection, "turbo")
+
+
+class TestCompressors:
+    def test_missing_client_modules_are_skipped(self, monkeypatch):
+        # Arrange
+        installed = {"zlib"}
+        monkeypatch.setattr(main_hw4.importlib.util, "find_spec",
+                            lambda name: object() if name in installed else None)
+
+        # Act / Assert
+        assert available_compressors("zstd,snappy,zlib,lz4") == ["zlib"]
@@ -0,0 +1,147 @@
+import time
+
+import pytest
+
+from hw4.main_hw4 import UserManager
+from hw4.user_cache import CachedUserManager
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def collection():
+    collection = mongomock.MongoClient().db.users
+    collection.insert_many([
+        {"name": "Alice", "city": "Moscow", "status": "active"},
+        {"name": "Bob", "city": "Moscow", "status": "active"},
+        {"name": "Carol", "city": "Kazan", "status": "active"},
+    ])
+    return collection
+
+
+@pytest.fixture
+def make_cached(collection):
+    """CachedUserManager поверх mongomock; mongomock не умеет watch, поэтому режим опроса"""
+    created = []
+
+    def make(manager=None, **kwargs):
+        kwargs.setdefault("poll_interval", 60)
+        cached = CachedUserManager(manager or UserManager(collection), **kwargs)
+        created.append(cached)
+        return cached
+
+    yield make
+    for cached in created:
+        cached.close()
+
+
+def names(docs):
+    return sorted(doc["name"] for doc in docs)
+
+
+class TestCachedUserManager:
+    """Кеш активных пользователей по городам"""
+
+    def test_second_read_is_served_from_memory(self, make_cached, collection):
+        # Arrange
+        cached = make_cached()
+        cached.get_active_by_city("Moscow")
+        collection.insert_one({"name": "Dave", "city": "Moscow", "status": "active"})  # мимо обертки
+
+        # Act
+        docs = cached.get_active_by_city("Moscow")
+
+        # Assert
+        assert names(docs) == ["Alice", "Bob"]
+        assert cached.stats() == {"mode": "polling", "hits": 1, "misses": 1, "cities": 1}
+
+    def test_returned_documents_are_copies(self, make_cached):
+        # Arrange
+        cached = make_cached()
+
+        # Act
+        cached.get_active_by_city("Moscow")[0]["name"] = "Mallory"
+
+        # Assert
+        assert names(cached.get_active_by_city("Moscow")) == ["Alice", "Bob"]
+
+    def test_update_through_wrapper_reads_own_write(self, make_cached):
+        # Arrange
+        cached = make_cached()
+        cached.get_active_by_city("Moscow")
+        cached.get_active_by_city("Kazan")
+
+        # Act
+        cached.update_status("Alice", "inactive")
+
+        # Assert
+        assert cached.stats()["cities"] == 1     # Kazan остался в кеше
+        assert names(cached.get_active_by_city("Moscow")) == ["Bob"]
+
+    def test_change_event_invalidates_old_and_new_city(self, make_cached, collection):
+        # Arrange
+        cached = make_cached()
+        cached.get_active_by_city("Moscow")
+        cached.get_active_by_city("Kazan")
+        alice = collection.find_one_and_update({"name": "Alice"}, {"$set": {"city": "Kazan"}},
+                                               return_document=True)
+
+        # Act: событие update без pre-image, прежний город берется из кеша
+        cached.apply_change({"operationType": "update", "documentKey": {"_id": alice["_id"]},
+                             "fullDocument": alice})
+
+        # Assert
+        assert names(cached.get_active_by_city("Moscow")) == ["Bob"]
+        assert names(cached.get_active_by_city("Kazan")) == ["Alice", "Carol"]
+
+    def test_drop_event_clears_everything(self, make_cached):
+        # Arrange
+        cached = make_cached()
+        cached.get_active_by_city("Moscow")
+
+        # Act
+        cached.apply_change({"operationType": "drop"})
+
+        # Assert
+        assert cached.stats()["cities"] == 0
+
+    def test_polling_invalidates_external_writes(self, make_cached, collection):
+        # Arrange
+        cached = make_cached(poll_interval=0.05)
+        cached.get_active_by_city("Moscow")
+
+        # Act
+        collection.insert_one({"name": "Dave", "city": "Moscow", "status": "active"})
+        time.sleep(0.2)
+
+        # Assert
+        assert names(cached.get_active_by_city("Moscow")) == ["Alice", "Bob", "Dave"]
+
+    def test_result_of_invalidated_query_is_not_cached(self, make_cached, collection):
+        """Инвалидация во время запроса: устаревший результат не остается в кеше"""
+        # Arrange
+        class RacingManager(UserManager):
+            def get_active_by_city(self, city, profile=None):
+                docs = super().get_active_by_city(city, profile)
+                collection.update_one({"name": "Alice"}, {"$set": {"status": "inactive"}})
+                cached.invalidate(city)
+                return docs
+
+        cached = make_cached(RacingManager(collection))
+
+        # Act
+        first = cached.get_active_by_city("Moscow")
+
+        # Assert
+        assert names(first) == ["Alice", "Bob"]
+        assert cached.stats()["cities"] == 0
+
+    def test_other_methods_are_delegated(self, make_cached):
+        # Arrange
+        cached = make_cached(use_change_stream=False)
+
+        # Act
+        stats = {doc["_id"]: doc["count"] for doc in cached.city_stats()}
+
+        # Assert
+        assert stats == {"Moscow": 2, "Kazan": 1}
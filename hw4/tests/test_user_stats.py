@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from hw4.main_hw4 import CITY_STATS_PIPELINE
+from hw4.user_stats import UserStats
+
+RECORDS = [
+    {"_id": 1, "age": 20, "city": "Moscow", "status": "active"},
+    {"_id": 2, "age": 30, "city": "Moscow", "status": "inactive"},
+    {"_id": 3, "age": None, "city": "Moscow", "status": "active"},
+    {"_id": 4, "age": 40, "city": "Kazan", "status": "active"},
+    {"_id": 5, "city": None, "status": "active"},
+]
+
+
+@pytest.fixture
+def stats():
+    return UserStats.from_records(RECORDS, capacity=2)
+
+
+class TestUserStats:
+    """Векторные группировки и инкрементальные изменения"""
+
+    def test_group_by_city_ignores_missing_ages(self, stats):
+        assert stats.group_by_city() == {
+            "Moscow": {"count": 3, "avg_age": 25.0},
+            "Kazan": {"count": 1, "avg_age": 40.0},
+            None: {"count": 1, "avg_age": None},
+        }
+
+    def test_filter(self, stats):
+        # Act
+        active = stats.filter(status="active")
+        adults = stats.filter(min_age=25)
+
+        # Assert
+        assert stats.count(active) == 4
+        assert stats.group_by_city(active)["Moscow"] == {"count": 2, "avg_age": 20.0}
+        assert stats.count(adults) == 2      # без возраста не проходят условие на age
+        assert stats.count(stats.filter(city="Perm")) == 0
+
+    def test_age_histogram_skips_missing_ages(self, stats):
+        # Act
+        counts, edges = stats.age_histogram(bins=[0, 25, 50])
+
+        # Assert
+        assert counts.tolist() == [1, 2]
+        assert edges.tolist() == [0, 25, 50]
+
+    def test_delete_reuses_row(self, stats):
+        # Act
+        assert stats.delete(4) is True
+        assert stats.delete(4) is False
+        stats.upsert(6, {"age": 50, "city": "Perm", "status": "active"})
+
+        # Assert
+        assert stats.size == 5
+        assert set(stats.group_by_city()) == {"Moscow", "Perm", None}
+        assert stats.group_by_city()["Perm"] == {"count": 1, "avg_age": 50.0}
+
+    def test_upsert_updates_only_given_fields(self, stats):
+        # Act
+        stats.upsert(1, {"city": "Kazan"})
+
+        # Assert
+        assert stats.group_by_city()["Kazan"] == {"count": 2, "avg_age": 30.0}
+        assert stats.count(stats.filter(city="Kazan", status="active")) == 2
+
+    def test_apply_change_stream_events(self, stats):
+        # Act
+        stats.apply_change({"operationType": "update", "documentKey": {"_id": 2},
+                            "updateDescription": {"updatedFields": {"status": "active"},
+                                                  "removedFields": ["age"]}})
+        stats.apply_change({"operationType": "replace", "documentKey": {"_id": 4},
+                            "fullDocument": {"_id": 4, "city": "Perm"}})
+        stats.apply_change({"operationType": "delete", "documentKey": {"_id": 5}})
+        stats.apply_change({"operationType": "insert", "documentKey": {"_id": 7},
+                            "fullDocument": {"_id": 7, "age": 60, "city": "Moscow", "status": "inactive"}})
+
+        # Assert
+        assert stats.group_by_city() == {
+            "Moscow": {"count": 4, "avg_age": 40.0},
+            "Perm": {"count": 1, "avg_age": None},
+        }
+        assert stats.count(stats.filter(status="active")) == 3   # 1, 2, 3; replace сбросил статус 4
+
+    def test_matches_mongo_group(self):
+        """Те же числа, что $group по city в MongoDB (mongomock)"""
+        # Arrange
+        mongomock = pytest.importorskip("mongomock")
+        collection = mongomock.MongoClient().db.users
+        rng = np.random.default_rng(0)
+        collection.insert_many([
+            {"age": None if i % 7 == 0 else int(rng.integers(18, 80)),
+             "city": ["Moscow", "Kazan", "Perm"][i % 3], "status": "active"}
+            for i in range(300)
+        ])
+
+        # Act
+        stats = UserStats.from_mongo(collection, batch_size=50)
+        expected = {doc["_id"]: {"count": doc["count"], "avg_age": doc["avg_age"]}
+                    for doc in collection.aggregate(CITY_STATS_PIPELINE)}
+
+        # Assert
+        groups = stats.group_by_city()
+        assert groups.keys() == expected.keys()
+        for city, group in groups.items():
+            assert group["count"] == expected[city]["count"]
+            assert group["avg_age"] == pytest.approx(expected[city]["avg_age"])
@@ -0,0 +1,161 @@
+"""Кеш get_active_by_city поверх UserManager с инвалидацией по change stream.
+
+Записи могут приходить из любого сервиса, поэтому кеш подписывается на
+change stream коллекции и сбрасывает списки затронутых городов. Если
+change stream недоступен (mongomock, standalone-сервер без replica set),
+включается опрос: весь кеш сбрасывается раз в poll_interval секунд.
+В обоих случаях чтение отстает от записи не больше чем на задержку
+доставки события или poll_interval.
+
+Пример:
+    from hw4.main_hw4 import UserManager
+    from hw4.user_cache import CachedUserManager
+    cached = CachedUserManager(UserManager(users))
+    cached.get_active_by_city("Moscow")   # из БД
+    cached.get_active_by_city("Moscow")   # из памяти
+    cached.close()
+"""
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class CachedUserManager:
+    """Обертка над UserManager: активные пользователи по городам из памяти"""
+
+    def __init__(self, manager, poll_interval: float = 1.0, use_change_stream: bool = True):
+        self.manager = manager
+        self.col = manager.col
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._cache: Dict[str, List[dict]] = {}
+        # Город каждого закешированного документа: событие update/delete без
+        # pre-image не содержит прежнего города
+        self._city_of: Dict[Any, str] = {}
+        # Поколение города растет при каждой инвалидации; результат запроса,
+        # начатого до инвалидации, в кеш не попадает
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+        self._stop = threading.Event()
+        self._stream = None
+        self.mode = 'polling'
+        if use_change_stream:
+            try:
+                self._stream = self.col.watch(full_document='updateLookup')
+                self.mode = 'change_stream'
+            # mongomock не реализует watch и бросает TypeError,
+            # standalone-сервер отвечает OperationFailure
+            except (TypeError, NotImplementedError, OperationFailure) as e:
+                logger.warning('Change stream unavailable (%s), falling back to polling every %.1fs',
+                               e, poll_interval)
+        self._thread = threading.Thread(
+            target=self._watch if self._stream is not None else self._poll,
+            name='user-cache-invalidation', daemon=True,
+        )
+        self._thread.start()
+
+    # ---------- чтение и запись ----------
+
+    def get_active_by_city(self, city: str, profile: Optional[str] = None) -> List[dict]:
+        with self._lock:
+            docs = self._cache.get(city)
+            if docs is not None:
+                self.hits += 1
+                return [dict(doc) for doc in docs]
+            self.misses += 1
+            generation = self._generations.get(city, 0)
+
+        docs = self.manager.get_active_by_city(city, profile=profile)
+        with self._lock:
+            if self._generations.get(city, 0) == generation:
+                self._cache[city] = docs
+                for doc in docs:
+                    self._city_of[doc['_id']] = city
+        return [dict(doc) for doc in docs]
+
+    def update_status(self, name: str, status: str, profile: Optional[str] = None):
+        """Запись через обертку сразу сбрасывает затронутые города (read-your-writes)"""
+        doc = self.col.find_one({'name': name}, {'city': 1})
+        result = self.manager.update_status(name, status, profile=profile)
+        if doc is not None:
+            self.invalidate(doc.get('city'), doc['_id'])
+        return result
+
+    def __getattr__(self, name):
+        # Остальные методы UserManager без кеширования
+        if name == 'manager':
+            raise AttributeError(name)
+        return getattr(self.manager, name)
+
+    # ---------- инвалидация ----------
+
+    def invalidate(self, city: Optional[str] = None, doc_id: Any = None) -> None:
+        """Сбрасывает город и прежний город документа; без аргументов — весь кеш"""
+        with self._lock:
+            if city is None and doc_id is None:
+                cities = set(self._cache) | set(self._generations)
+            else:
+                cities = {city, self._city_of.get(doc_id)} - {None}
+            for name in cities:
+                docs = self._cache.pop(name, None) or []
+                for doc in docs:
+                    self._city_of.pop(doc['_id'], None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def apply_change(self, change: dict) -> None:
+        """Инвалидация по событию change stream"""
+        operation = change['operationType']
+        if operation in ('insert', 'update', 'replace', 'delete'):
+            doc_id = change['documentKey']['_id']
+            document = change.get('fullDocument')
+            if operation != 'delete' and document is None:
+                # Документ уже удален к моменту updateLookup, прежний город неизвестен
+                self.invalidate()
+            else:
+                self.invalidate((document or {}).get('city'), doc_id)
+        elif operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+            self.invalidate()
+
+    def _watch(self):
+        try:
+            with self._stream:
+                while not self._stop.is_set():
+                    change = self._stream.try_next()
+                    if change is not None:
+                        self.apply_change(change)
+                    elif self._stream.alive:
+                        continue
+                    else:
+                        break
+        except PyMongoError as e:
+            if self._stop.is_set():
+                return
+            logger.warning('Change stream failed (%s), falling back to polling', e)
+        if not self._stop.is_set():
+            self.mode = 'polling'
+            self.invalidate()
+            self._poll()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self.invalidate()
+
+    # ---------- служебное ----------
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'mode': self.mode, 'hits': self.hits, 'misses': self.misses,
+                    'cities': len(self._cache)}
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._stream is not None:
+            self._stream.close()
+        self._thread.join(timeout=self.poll_interval + 1)
@@ -0,0 +1,180 @@
+"""Локальная аналитика по пользователям на колонках NumPy.
+
+Пользователи загружаются один раз в массивы (возраст, признак наличия
+возраста, код города, признак active, признак живой строки), дальше записи применяются инкрементально
+через upsert/delete/apply_change, а группировки, фильтры и гистограммы
+считаются векторно в памяти без запроса к БД. Строки без возраста, как и
+в $avg MongoDB, не участвуют в среднем возрасте и гистограмме.
+
+Пример:
+    from pymongo import MongoClient
+    from hw4.user_stats import UserStats
+
+    stats = UserStats.from_mongo(MongoClient()["simple_db"].users)
+    stats.group_by_city()                     # как $group по city
+    stats.group_by_city(stats.filter(status="active"))
+    stats.age_histogram(bins=[20, 30, 40, 50])
+"""
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+NO_CITY = -1
+
+
+class UserStats:
+    """Колоночное хранилище пользователей с векторными запросами"""
+
+    def __init__(self, capacity: int = 1024):
+        self.ages = np.zeros(capacity, dtype=np.int32)
+        self.has_age = np.zeros(capacity, dtype=bool)
+        self.city_codes = np.full(capacity, NO_CITY, dtype=np.int16)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+
+        self.cities = []
+        self._city_codes: Dict[str, int] = {}
+        self._rows: Dict[Any, int] = {}
+        self._free = []
+
+    # ---------- загрузка ----------
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], key: str = '_id',
+                     capacity: int = 1024) -> 'UserStats':
+        """Строит хранилище из словарей с полями age, city, status"""
+        stats = cls(capacity=capacity)
+        for record in records:
+            stats.upsert(record[key], record)
+        return stats
+
+    @classmethod
+    def from_mongo(cls, collection, batch_size: int = 10000) -> 'UserStats':
+        """Загружает коллекцию, читая только нужные поля"""
+        cursor = collection.find({}, {'age': 1, 'city': 1, 'status': 1}).batch_size(batch_size)
+        return cls.from_records(cursor, capacity=max(collection.estimated_document_count(), 1))
+
+    @classmethod
+    def from_database_manager(cls, manager) -> 'UserStats':
+        """Загружает таблицу users из hw2 DatabaseManager (города и статуса там нет)"""
+        return cls.from_records(manager.get_users_by_age(), key='id')
+
+    # ---------- инкрементальные изменения ----------
+
+    def _grow(self):
+        capacity = max(len(self.ages) * 2, 1)
+        self.ages = np.resize(self.ages, capacity)
+        self.has_age = np.resize(self.has_age, capacity)
+        self.city_codes = np.resize(self.city_codes, capacity)
+        self.active = np.resize(self.active, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.size] = self.alive[:self.size]
+        self.alive = alive
+
+    def _city_code(self, city: Optional[str]) -> int:
+        if city is None:
+            return NO_CITY
+        if city not in self._city_codes:
+            self._city_codes[city] = len(self.cities)
+            self.cities.append(city)
+        return self._city_codes[city]
+
+    def upsert(self, key: Any, fields: dict) -> None:
+        """Добавляет пользователя или обновляет только переданные поля"""
+        row = self._rows.get(key)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self.size == len(self.ages):
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self._rows[key] = row
+            self.ages[row] = 0
+            self.has_age[row] = False
+            self.city_codes[row] = NO_CITY
+            self.active[row] = False
+            self.alive[row] = True
+
+        if 'age' in fields:
+            age = fields['age']
+            self.has_age[row] = age is not None
+            self.ages[row] = age if age is not None else 0
+        if 'city' in fields:
+            self.city_codes[row] = self._city_code(fields['city'])
+        if 'status' in fields:
+            self.active[row] = fields['status'] == 'active'
+
+    def delete(self, key: Any) -> bool:
+        row = self._rows.pop(key, None)
+        if row is None:
+            return False
+        self.alive[row] = False
+        self._free.append(row)
+        return True
+
+    def apply_change(self, change: dict) -> None:
+        """Применяет событие change stream MongoDB (insert/update/replace/delete)"""
+        key = change['documentKey']['_id']
+        operation = change['operationType']
+        if operation in ('insert', 'replace'):
+            self.delete(key)
+            self.upsert(key, change['fullDocument'])
+        elif operation == 'update':
+            description = change.get('updateDescription', {})
+            fields = dict(description.get('updatedFields', {}))
+            fields.update({name: None for name in description.get('removedFields', [])})
+            self.upsert(key, fields)
+        elif operation == 'delete':
+            self.delete(key)
+
+    # ---------- запросы ----------
+
+    def filter(self, min_age: Optional[int] = None, max_age: Optional[int] = None,
+               city: Optional[str] = None, status: Optional[str] = None) -> np.ndarray:
+        """Булева маска строк, подходящих под все условия"""
+        mask = self.alive[:self.size].copy()
+        if min_age is not None or max_age is not None:
+            # Как в MongoDB: условие на age не выполняется для документа без age
+            mask &= self.has_age[:self.size]
+        if min_age is not None:
+            mask &= self.ages[:self.size] >= min_age
+        if max_age is not None:
+            mask &= self.ages[:self.size] <= max_age
+        if city is not None:
+            mask &= self.city_codes[:self.size] == self._city_codes.get(city, NO_CITY - 1)
+        if status is not None:
+            mask &= self.active[:self.size] == (status == 'active')
+        return mask
+
+    def count(self, mask: Optional[np.ndarray] = None) -> int:
+        return int(np.count_nonzero(self.alive[:self.size] if mask is None else mask))
+
+    def group_by_city(self, mask: Optional[np.ndarray] = None) -> Dict[Optional[str], dict]:
+        """Число пользователей и средний возраст по городам (аналог $group).
+
+        avg_age считается только по строкам с возрастом и равен None, если
+        таких в городе нет, как $avg в MongoDB.
+        """
+        mask = self.alive[:self.size] if mask is None else mask
+        # Сдвиг на 1, чтобы NO_CITY попал в нулевую корзину bincount
+        codes = self.city_codes[:self.size][mask].astype(np.int64) + 1
+        has_age = self.has_age[:self.size][mask]
+        length = len(self.cities) + 1
+        counts = np.bincount(codes, minlength=length)
+        age_counts = np.bincount(codes, weights=has_age, minlength=length)
+        age_sums = np.bincount(codes, weights=self.ages[:self.size][mask] * has_age, minlength=length)
+
+        groups = {}
+        for code in np.flatnonzero(counts):
+            city = self.cities[code - 1] if code else None
+            avg_age = float(age_sums[code] / age_counts[code]) if age_counts[code] else None
+            groups[city] = {'count': int(counts[code]), 'avg_age': avg_age}
+        return groups
+
+    def age_histogram(self, bins=10, mask: Optional[np.ndarray] = None):
+        """Гистограмма возрастов без строк с неизвестным возрастом: (число в корзине, границы корзин)"""
+        mask = (self.alive[:self.size] if mask is None else mask) & self.has_age[:self.size]
+        return np.histogram(self.ages[:self.size][mask], bins=bins)
@@ -1,8 +1,13 @@
-from typing import Type, List
+from typing import Type, List, Iterable
 
+from sqlalchemy import insert, inspect, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from ..models.user import User
 
+# Максимальное число id в одном запросе пакетного чтения
+BATCH_CHUNK_SIZE = 1000
+
 
 class UserRepository:
     def __init__(self, db: Session):
@@ -11,6 +16,15 @@ class UserRepository:
     def get_by_id(self, user_id: int) -> Type[User] | None:
         return self.db.query(User).filter(User.id == user_id).first()
 
+    def get_by_ids(self, user_ids: Iterable[int]) -> dict[int, User | None]:
+        unique_ids = list(dict.fromkeys(user_ids))
+        users: dict[int, User | None] = dict.fromkeys(unique_ids)
+        for start in range(0, len(unique_ids), BATCH_CHUNK_SIZE):
+            chunk = unique_ids[start:start + BATCH_CHUNK_SIZE]
+            for user in self.db.query(User).filter(User.id.in_(chunk)):
+                users[user.id] = user
+        return users
+
     def get_by_email(self, email: str) -> Type[User] | None:
         return self.db.query(User).filter(User.email == email).first()
 
@@ -18,20 +32,37 @@ class UserRepository:
         return self.db.query(User).all()
 
     def create(self, email: str, username: str, full_name: str) -> User:
-        user = User(email=email, username=username, full_name=full_name)
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        # INSERT ... RETURNING сразу наполняет объект, отдельный refresh не нужен
+        user = self.db.scalars(
+            insert(User)
+            .values(email=email, username=username, full_name=full_name)
+            .returning(User)
+        ).one()
+        self._commit_returned(user)
         return user
 
     def update(self, user_id: int, full_name: str) -> User:
-        user = self.get_by_id(user_id)
+        user = self.db.scalars(
+            update(User)
+            .where(User.id == user_id)
+            .values(full_name=full_name)
+            .returning(User)
+        ).first()
         if user:
-            user.full_name = full_name
-            self.db.commit()
-            self.db.refresh(user)
+            self._commit_returned(user)
         return user
 
+    def _commit_returned(self, user: User) -> None:
+        """Фиксирует транзакцию, сохраняя в user значения из RETURNING.
+
+        commit() с expire_on_commit=True (по умолчанию) сбрасывает атрибуты,
+        и первое же чтение поля выполнило бы лишний SELECT
+        """
+        values = {key: getattr(user, key) for key in inspect(user).mapper.column_attrs.keys()}
+        self.db.commit()
+        for key, value in values.items():
+            set_committed_value(user, key, value)
+
     def delete(self, user_id: int) -> bool:
         user = self.get_by_id(user_id)
         if user:
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 from sqlalchemy.exc import IntegrityError
 from ..models.user import User
 
@@ -31,6 +32,26 @@ class TestUserRepository:
         assert found_user.id == created_user.id
         assert found_user.email == created_user.email
 
+    def test_get_users_by_ids_success(self, user_repository):
+        """Пакетное получение пользователей по списку ID"""
+        # Arrange
+        user1 = user_repository.create(
+            email="user1@example.com",
+            username="user1",
+            full_name="User One"
+        )
+        user2 = user_repository.create(
+            email="user2@example.com",
+            username="user2",
+            full_name="User Two"
+        )
+
+        # Act
+        found_users = user_repository.get_by_ids([user1.id, user2.id, user1.id])
+
+        # Assert
+        assert found_users == {user1.id: user1, user2.id: user2}
+
     def test_get_user_by_email_success(self, user_repository, sample_user_data):
         """Успешное получение пользователя по email"""
         # Arrange
@@ -78,6 +99,45 @@ class TestUserRepository:
         assert updated_user is not None
         assert updated_user.full_name == new_name
 
+    def test_create_user_single_statement(self, user_repository, sample_user_data, engine):
+        """Создание и чтение полей созданного пользователя - один INSERT ... RETURNING"""
+        # Arrange
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # Act
+        user = user_repository.create(**sample_user_data)
+        fields = (user.id, user.email, user.username, user.full_name, user.created_at)
+
+        # Assert
+        assert len(statements) == 1
+        assert statements[0].startswith("INSERT INTO users")
+        assert "RETURNING" in statements[0]
+        assert fields[1:4] == (sample_user_data["email"], sample_user_data["username"],
+                               sample_user_data["full_name"])
+        assert fields[4] is not None
+
+    def test_update_user_single_statement(self, user_repository, sample_user_data, engine):
+        """Обновление и чтение полей результата - один UPDATE ... RETURNING"""
+        # Arrange
+        user = user_repository.create(**sample_user_data)
+        loaded_user = user_repository.get_by_id(user.id)
+        statements = []
+        event.listen(engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # Act
+        updated_user = user_repository.update(user.id, "Updated Name")
+        fields = (updated_user.id, updated_user.email, updated_user.full_name)
+
+        # Assert
+        assert len(statements) == 1
+        assert statements[0].startswith("UPDATE users")
+        assert "RETURNING" in statements[0]
+        assert updated_user is loaded_user
+        assert fields == (user.id, sample_user_data["email"], "Updated Name")
+
     def test_delete_user_success(self, user_repository, sample_user_data):
         """Успешное удаление пользователя"""
         # Arrange
@@ -114,6 +174,18 @@ class TestUserRepository:
         # Assert
         assert user is None
 
+    def test_get_users_by_ids_reports_missing(self, user_repository, sample_user_data):
+        """Ненайденные ID возвращаются со значением None"""
+        # Arrange
+        user = user_repository.create(**sample_user_data)
+
+        # Act
+        found_users = user_repository.get_by_ids([user.id, 999])
+
+        # Assert
+        assert found_users[user.id] is user
+        assert found_users[999] is None
+
     def test_update_user_not_found(self, user_repository):
         """Попытка обновления несуществующего пользователя"""
         # Act
@@ -1,6 +1,12 @@
 import psycopg2
+import psycopg2.pool
 from sqlalchemy import create_engine, text
 import getpass
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 
 # Конфигурация
 DB_CONFIG = {
@@ -10,6 +16,24 @@ DB_CONFIG = {
     "password": getpass.getpass("Пароль БД: ")
 }
 
+# Колонки, по которым разрешено фильтровать. Имена колонок нельзя передать
+# параметром, поэтому в текст запроса попадают только имена из этого списка
+ALLOWED_FILTERS = ("id", "username", "email", "is_admin")
+
+# Размер пачки строк при потоковом чтении
+FETCH_CHUNK_SIZE = 1000
+
+# Размеры пула по умолчанию
+POOL_MIN_CONN = 1
+POOL_MAX_CONN = 10
+
+_pool = None
+# Свободные соединения пула: getconn при пустом пуле бросает PoolError, а не ждет
+_pool_slots = None
+# Создание и закрытие пула из разных потоков
+_pool_lock = threading.Lock()
+_cursor_names = itertools.count()
+
 
 def setup_db():
     """Настройка тестовой БД"""
@@ -103,31 +127,125 @@ def secure_auth_sqlalchemy(username):
     return result
 
 
-def secure_dynamic_query(filters):
-    """Динамический безопасный запрос"""
-    conn = psycopg2.connect(**DB_CONFIG)
-    cur = conn.cursor()
-
+@lru_cache(maxsize=256)
+def _dynamic_query_text(shape):
+    """Текст запроса для набора (колонка, список ли значение); значения не участвуют"""
     query = "SELECT * FROM users WHERE 1=1"
-    params = []
+    for column, is_list in shape:
+        query += f" AND {column} = ANY(%s)" if is_list else f" AND {column} = %s"
+    return query + " ORDER BY id"
+
+
+def build_dynamic_query(filters):
+    """Параметризованный запрос по фильтрам: (текст, параметры).
+
+    Текст кешируется по форме фильтров, поэтому разные значения с теми же
+    ключами дают одну и ту же строку запроса.
+    """
+    unknown = set(filters) - set(ALLOWED_FILTERS)
+    if unknown:
+        raise ValueError(f"Недопустимые фильтры: {sorted(unknown)}")
+
+    columns = [column for column in ALLOWED_FILTERS if column in filters]
+    shape = tuple((column, isinstance(filters[column], (list, tuple, set))) for column in columns)
+    params = [list(filters[column]) if is_list else filters[column] for column, is_list in shape]
+    return _dynamic_query_text(shape), params
+
+
+def get_pool(minconn=None, maxconn=None):
+    """Общий потокобезопасный пул соединений (создается при первом вызове).
+
+    Размеры задаются только при создании (по умолчанию 1 и 10); если пул
+    уже есть, другие minconn/maxconn дают ValueError, а не молча игнорируются.
+    """
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is None:
+            minconn = POOL_MIN_CONN if minconn is None else minconn
+            maxconn = POOL_MAX_CONN if maxconn is None else maxconn
+            _pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **DB_CONFIG)
+            _pool_slots = threading.BoundedSemaphore(maxconn)
+        elif minconn not in (None, _pool.minconn) or maxconn not in (None, _pool.maxconn):
+            raise ValueError(
+                f"Пул уже создан с minconn={_pool.minconn}, maxconn={_pool.maxconn}; "
+                "чтобы изменить размеры, сначала вызовите close_pool()"
+            )
+        return _pool
+
+
+def close_pool():
+    """Закрывает все соединения пула"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = _pool_slots = None
+
+
+@contextmanager
+def pooled_connection():
+    """Соединение из пула; ждет освобождения, если все заняты. При ошибке транзакция откатывается"""
+    pool = get_pool()
+    with _pool_slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn)
+
+
+def iter_dynamic_query(filters, chunk_size=FETCH_CHUNK_SIZE, server_side=False):
+    """Строки динамического запроса пачками по chunk_size.
+
+    С server_side=True используется именованный курсор: результат остается
+    на сервере и приходит по сети частями, а не целиком при execute.
+    """
+    query, params = build_dynamic_query(filters)
+    return _iter_query(query, params, chunk_size, server_side)
+
+
+def _iter_query(query, params, chunk_size=FETCH_CHUNK_SIZE, server_side=False):
+    """Построчное чтение уже построенного запроса через пул"""
+    with pooled_connection() as conn:
+        if server_side:
+            cur = conn.cursor(name=f"dynamic_query_{next(_cursor_names)}")
+            cur.itersize = chunk_size
+        else:
+            cur = conn.cursor()
+        try:
+            cur.execute(query, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cur.close()
+
+
+def secure_dynamic_query(filters, verbose=True):
+    """Динамический безопасный запрос"""
+    query, params = build_dynamic_query(filters)
 
-    if 'username' in filters:
-        query += " AND username = %s"
-        params.append(filters['username'])
+    if verbose:
+        print(f"[Динамический запрос]: {query}")
+        print(f"   Параметры: {params}")
 
-    if 'is_admin' in filters:
-        query += " AND is_admin = %s"
-        params.append(filters['is_admin'])
+    return list(_iter_query(query, params))
 
-    print(f"[Динамический запрос]: {query}")
-    print(f"   Параметры: {params}")
 
-    cur.execute(query, params)
-    results = cur.fetchall()
+def run_dynamic_queries(filter_sets, max_workers=8):
+    """Выполняет несколько наборов фильтров параллельно, результаты в порядке входа.
 
-    cur.close()
-    conn.close()
-    return results
+    Потоков не больше maxconn пула: лишние все равно ждали бы соединения.
+    """
+    max_workers = min(max_workers, get_pool().maxconn)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(lambda filters: secure_dynamic_query(filters, verbose=False), filter_sets))
 
 
 # ==================== ДЕМОНСТРАЦИЯ ====================
@@ -206,12 +324,24 @@ def main():
         print("\n2. Динамический фильтр:")
         secure_dynamic_query({"username": "admin", "is_admin": True})
 
+        # Параллельное выполнение, в том числе с попыткой инъекции в значении
+        print("\n3. Параллельные фильтры:")
+        filter_sets = [
+            {"is_admin": True},
+            {"username": ["admin", "user1"]},
+            {"username": "admin' --"},
+        ]
+        for filters, rows in zip(filter_sets, run_dynamic_queries(filter_sets)):
+            print(f"   {filters}: {len(rows)} записей")
+
         print("\n" + "=" * 50)
         print("ВЫВОД: Всегда используйте параметризацию!")
         print("       Никогда не конкатенируйте пользовательский ввод.")
 
     except Exception as e:
         print(f"\n[Ошибка]: {e}")
+    finally:
+        close_pool()
 
 
 if __name__ == "__main__":
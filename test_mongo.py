@@ -1,5 +1,6 @@
-from pymongo import MongoClient
-from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from datetime import datetime, timedelta
+import random
 
 client = MongoClient('mongodb://localhost:27017/')
 db = client['test_database']
@@ -9,6 +10,9 @@ users_collection = db['users']
 products_collection = db['products']
 orders_collection = db['orders']
 
+# Сколько последних заказов хранится прямо в документе пользователя
+RECENT_ORDERS = 5
+
 
 def clear_collections():
     """Функция для очистки данных (коллекций)"""
@@ -72,11 +76,145 @@ def delete_operations():
     print(f"Удалено пользователей: {result.deleted_count}")
 
 
+# ==================== ИНДЕКСЫ И ЗАКАЗЫ ====================
+
+def setup_indexes(database=db):
+    """Индексы под запросы: поиск по email, заказы пользователя по дате"""
+    database['users'].create_index('email', unique=True)
+    database['users'].create_index('city')
+    database['products'].create_index('category')
+    # Равенство по user_id + сортировка по created_at покрываются одним индексом
+    database['orders'].create_index([('user_id', ASCENDING), ('created_at', DESCENDING)])
+    print("Индексы созданы")
+
+
+def create_products(database=db):
+    """Функция для создания товаров"""
+    products = [
+        {'name': 'Ноутбук', 'category': 'electronics', 'price': 75000},
+        {'name': 'Телефон', 'category': 'electronics', 'price': 45000},
+        {'name': 'Книга', 'category': 'books', 'price': 900},
+        {'name': 'Кружка', 'category': 'home', 'price': 500},
+    ]
+    result = database['products'].insert_many(products)
+    print(f"Создано товаров: {len(result.inserted_ids)}")
+    return result.inserted_ids
+
+
+def create_order(user_id, items, created_at=None, database=db):
+    """Создает заказ и обновляет денормализованный список последних заказов пользователя.
+
+    items: [{'product_id': ..., 'quantity': ..., 'price': ...}]. Два отдельных
+    запроса без транзакции: при сбое между ними read model догоняется через
+    rebuild_recent_orders.
+    """
+    order = {
+        'user_id': user_id,
+        'items': items,
+        'total': sum(item['price'] * item['quantity'] for item in items),
+        'status': 'new',
+        'created_at': created_at or datetime.now(),
+    }
+    order['_id'] = database['orders'].insert_one(order).inserted_id
+    database['users'].update_one({'_id': user_id}, {'$push': {'recent_orders': {
+        '$each': [_order_summary(order)],
+        '$sort': {'created_at': -1},
+        '$slice': RECENT_ORDERS,
+    }}})
+    return order['_id']
+
+
+def _order_summary(order):
+    return {
+        'order_id': order['_id'],
+        'total': order['total'],
+        'status': order['status'],
+        'created_at': order['created_at'],
+    }
+
+
+def create_orders(count=20, database=db):
+    """Функция для создания случайных заказов"""
+    user_ids = [user['_id'] for user in database['users'].find({}, {'_id': 1})]
+    products = list(database['products'].find({}, {'price': 1}))
+    for i in range(count):
+        picked = random.sample(products, k=random.randint(1, len(products)))
+        items = [{'product_id': p['_id'], 'quantity': random.randint(1, 3), 'price': p['price']}
+                 for p in picked]
+        create_order(random.choice(user_ids), items, datetime.now() - timedelta(days=i), database)
+    print(f"Создано заказов: {count}")
+
+
+def order_history_pipeline(user_id, limit=10):
+    """История заказов с названиями товаров.
+
+    $match + $sort идут первыми и используют индекс (user_id, created_at);
+    $lookup по localField/foreignField ищет товары по индексу _id (условие
+    $expr с $in индекс не использует), pipeline оставляет только нужные поля.
+    Форма localField + pipeline требует MongoDB 5.0+.
+    """
+    return [
+        {'$match': {'user_id': user_id}},
+        {'$sort': {'created_at': -1}},
+        {'$limit': limit},
+        {'$lookup': {
+            'from': 'products',
+            'localField': 'items.product_id',
+            'foreignField': '_id',
+            'pipeline': [
+                {'$project': {'name': 1, 'price': 1}},
+            ],
+            'as': 'products',
+        }},
+        {'$project': {
+            '_id': 1, 'total': 1, 'status': 1, 'created_at': 1,
+            'products': '$products.name',
+        }},
+    ]
+
+
+def get_order_history(user_id, limit=10, database=db):
+    return list(database['orders'].aggregate(order_history_pipeline(user_id, limit)))
+
+
+def get_user_with_recent_orders(user_id, database=db):
+    """Горячее представление «пользователь и последние заказы» одним чтением по _id"""
+    return database['users'].find_one({'_id': user_id}, {'name': 1, 'email': 1, 'recent_orders': 1})
+
+
+def rebuild_recent_orders(database=db):
+    """Пересобирает recent_orders у всех пользователей из коллекции orders"""
+    pipeline = [
+        {'$sort': {'user_id': 1, 'created_at': -1}},
+        {'$group': {'_id': '$user_id', 'orders': {'$push': {
+            'order_id': '$_id', 'total': '$total', 'status': '$status', 'created_at': '$created_at',
+        }}}},
+        {'$project': {'orders': {'$slice': ['$orders', RECENT_ORDERS]}}},
+    ]
+    requests = [UpdateOne({'_id': row['_id']}, {'$set': {'recent_orders': row['orders']}})
+                for row in database['orders'].aggregate(pipeline, allowDiskUse=True)]
+    if requests:
+        database['users'].bulk_write(requests, ordered=False)
+    print(f"Пересобрано пользователей: {len(requests)}")
+
+
+def show_order_history():
+    """Ф-ия вывода истории заказов"""
+    for user in users_collection.find({}, {'name': 1}):
+        print(f"{user['name']}:")
+        for order in get_order_history(user['_id'], limit=3):
+            print(f"  {order['created_at']:%Y-%m-%d} {order['total']} руб. {', '.join(order['products'])}")
+
+
 if __name__ == "__main__":
     try:
         clear_collections()
+        setup_indexes()
         create_users()
+        create_products()
+        create_orders()
         read_data()
+        show_order_history()
         update_operations()
         delete_operations()
         read_data()
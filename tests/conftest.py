@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pymongo import MongoClient
+
+from test_mongo import create_order, create_products, setup_indexes
+
+MONGO_URI = "mongodb://localhost:27017/"
+TEST_DATABASE = "test_mongo_plans"
+TEST_EMAIL = "test@example.com"
+
+
+@pytest.fixture(scope="module")
+def mongo_client():
+    """Клиент MongoDB; тесты пропускаются, если сервер недоступен"""
+    client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except Exception as e:
+        client.close()
+        pytest.skip(f"MongoDB недоступна: {e}")
+    yield client
+    client.close()
+
+
+@pytest.fixture(scope="module")
+def orders_db(mongo_client):
+    """Отдельная БД с индексами, товарами и 50 заказами одного пользователя"""
+    mongo_client.drop_database(TEST_DATABASE)
+    database = mongo_client[TEST_DATABASE]
+    setup_indexes(database)
+    user_id = database["users"].insert_one({"name": "Тест", "email": TEST_EMAIL}).inserted_id
+    product_ids = create_products(database)
+    for i in range(50):
+        create_order(user_id, [{"product_id": product_ids[i % 4], "quantity": 1, "price": 100}],
+                     datetime.now() - timedelta(hours=i), database)
+
+    yield database
+
+    mongo_client.drop_database(TEST_DATABASE)
+
+
+@pytest.fixture(scope="module")
+def order_user_id(orders_db):
+    """id пользователя с заказами"""
+    return orders_db["users"].find_one({"email": TEST_EMAIL})["_id"]
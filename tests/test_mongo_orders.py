@@ -0,0 +1,89 @@
+from test_mongo import (
+    RECENT_ORDERS, get_order_history, get_user_with_recent_orders, order_history_pipeline,
+    rebuild_recent_orders,
+)
+
+
+def plan_stages(explain):
+    """Все значения 'stage' из вывода explain (в любом месте плана)"""
+    if isinstance(explain, dict):
+        stages = [explain["stage"]] if isinstance(explain.get("stage"), str) else []
+        for key, value in explain.items():
+            if key not in ("rejectedPlans", "allPlansExecution"):
+                stages += plan_stages(value)
+        return stages
+    if isinstance(explain, list):
+        return [stage for item in explain for stage in plan_stages(item)]
+    return []
+
+
+def lookup_stage(explain):
+    """Стадия $lookup из explain агрегации с verbosity executionStats"""
+    return next(stage["$lookup"] | stage for stage in explain["stages"] if "$lookup" in stage)
+
+
+class TestOrderIndexes:
+    """Запросы истории заказов и поиска пользователя идут по индексам"""
+
+    def test_order_history_uses_index(self, orders_db, order_user_id):
+        """История заказов: IXSCAN без COLLSCAN и без сортировки в памяти"""
+        # Act
+        explain = orders_db.command("explain", {
+            "aggregate": "orders", "pipeline": order_history_pipeline(order_user_id), "cursor": {},
+        }, verbosity="queryPlanner")
+
+        # Assert
+        stages = plan_stages(explain)
+        assert "IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+        # Индекс отдает строки уже в нужном порядке
+        assert "SORT" not in stages
+        assert len(get_order_history(order_user_id, limit=5, database=orders_db)) == 5
+
+    def test_order_history_lookup_uses_id_index(self, orders_db, order_user_id):
+        """$lookup товаров идет по индексу _id, без просмотра products"""
+        # Act
+        explain = orders_db.command("explain", {
+            "aggregate": "orders", "pipeline": order_history_pipeline(order_user_id), "cursor": {},
+        }, verbosity="executionStats")
+
+        # Assert
+        lookup = lookup_stage(explain)
+        assert lookup["collectionScans"] == 0
+        assert lookup["indexesUsed"] == ["_id_"]
+        assert lookup["totalDocsExamined"] <= lookup["totalKeysExamined"]
+        history = get_order_history(order_user_id, limit=3, database=orders_db)
+        assert all(order["products"] for order in history)
+
+    def test_user_email_lookup_uses_index(self, orders_db):
+        """Поиск пользователя по email использует индекс"""
+        # Act
+        explain = orders_db["users"].find({"email": "test@example.com"}).explain()
+
+        # Assert
+        stages = plan_stages(explain)
+        assert "IXSCAN" in stages or "EXPRESS_IXSCAN" in stages
+        assert "COLLSCAN" not in stages
+
+
+class TestRecentOrders:
+    """Встроенный список последних заказов пользователя"""
+
+    def test_recent_orders_read_model(self, orders_db, order_user_id):
+        """Последние заказы отсортированы и восстанавливаются rebuild_recent_orders"""
+        # Act
+        user = get_user_with_recent_orders(order_user_id, orders_db)
+
+        # Assert
+        assert len(user["recent_orders"]) == RECENT_ORDERS
+        dates = [order["created_at"] for order in user["recent_orders"]]
+        assert dates == sorted(dates, reverse=True)
+
+        # Arrange
+        orders_db["users"].update_one({"_id": order_user_id}, {"$unset": {"recent_orders": ""}})
+
+        # Act
+        rebuild_recent_orders(orders_db)
+
+        # Assert
+        assert get_user_with_recent_orders(order_user_id, orders_db)["recent_orders"] == user["recent_orders"]